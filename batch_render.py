@@ -0,0 +1,76 @@
+import os
+import time
+import argparse
+import multiprocessing
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def render_file(input_file_path, output_dir):
+    import main   # every worker opens its own dummy display when it first renders
+    import pygame
+    from graph_io import load_graph
+    from graph_store import GraphStore
+    from projection import produce_projection_basis, produce_2d_positions_from_3d_positions
+
+    start_time = time.perf_counter()
+    graph_data = load_graph(input_file_path)
+    graph_store = GraphStore()
+    graph_store.load_positions(graph_data.positions)
+    graph_store.clamp(graph_data.max_value)
+    load_time = time.perf_counter()
+
+    main.x_axes.set_positions(graph_data.x_axes_alpha)
+    main.y_axes.set_positions(graph_data.y_axes_alpha)
+    main.z_axes.set_positions(graph_data.z_axes_alpha)
+    projection_basis = produce_projection_basis(graph_data.x_axes_alpha, graph_data.y_axes_alpha,
+                                                graph_data.z_axes_alpha)
+    graph_store.positions_2d[:] = produce_2d_positions_from_3d_positions(
+        graph_store.positions, projection_basis, graph_data.max_value,
+        main.AXES_LENGTH, main.GRAPH_CENTER_X, main.GRAPH_CENTER_Y)
+    main.SCREEN.fill(main.BG_COLOR)
+    main.draw_axes(main.SCREEN)
+    main.draw_dots(main.SCREEN, graph_store, graph_data.edges)
+    # the extension is kept, a graph and its conversion to another format share the rest of the name
+    output_file_path = os.path.join(output_dir, os.path.basename(input_file_path) + ".png")
+    pygame.image.save(main.SCREEN.subsurface((0, 0, 9 * main.W // 16, 9 * main.W // 16)), output_file_path)
+    render_time = time.perf_counter()
+    return os.path.basename(input_file_path), load_time - start_time, render_time - load_time
+
+
+def render_job(job):
+    return render_file(*job)
+
+
+def render_directory(input_dir, output_dir, processes=None):
+    from graph_io import list_graph_files
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(os.path.join(input_dir, file_name), output_dir) for file_name in sorted(list_graph_files(input_dir))]
+    # spawned workers, a forked SDL display is not safe to share
+    pool = multiprocessing.get_context("spawn").Pool(processes)
+    try:
+        yield from pool.imap(render_job, jobs)
+    finally:
+        # SDL catches SIGTERM, so the workers are let finish instead of being terminated
+        pool.close()
+        pool.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Renders every graph file of a directory to PNG without a window.")
+    parser.add_argument("input_dir", nargs="?", default=os.path.join(SCRIPT_DIR, "user_inputs"))
+    parser.add_argument("output_dir", nargs="?", default=os.path.join(SCRIPT_DIR, "outputs", "renders"))
+    parser.add_argument("-j", "--processes", type=int, default=None, help="worker processes, all cores by default")
+    arguments = parser.parse_args()
+
+    wall_start_time = time.perf_counter()
+    file_num = 0
+    print(f"{'file':<32}{'load ms':>10}{'render ms':>12}")
+    for file_name, load_seconds, render_seconds in render_directory(
+            arguments.input_dir, arguments.output_dir, arguments.processes):
+        file_num += 1
+        print(f"{file_name:<32}{load_seconds * 1000:>10.1f}{render_seconds * 1000:>12.1f}")
+    wall_seconds = time.perf_counter() - wall_start_time
+    print(f"{file_num} files in {wall_seconds:.2f} s")
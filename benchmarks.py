@@ -0,0 +1,244 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import numpy
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_SIZES = (10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)   # vertices of every generated graph
+BENCHMARK_PHASES = ("load", "clamp", "projection", "frame", "save")
+BENCHMARK_SEED = 3
+GEOMETRIC_MAX_VALUE = 1000
+GEOMETRIC_DEGREE = 6   # expected neighbours of a vertex of a random geometric graph
+CLIQUE_SIZE = 16
+CLIQUE_SPREAD = 20   # how far the vertices of a clique lie from its center
+REGRESSION_TOLERANCE = 0.25   # a phase this much slower than its baseline is a regression
+REGRESSION_MIN_SECONDS = 0.001   # differences below it are timer noise
+
+
+def produce_grid_graph(vertex_num, rng=None):
+    # the first vertices of a cube lattice on integer coordinates, every vertex connected to its lattice neighbours
+    from graph_io import GraphData
+    side = max(2, round(vertex_num ** (1 / 3) + 0.5))
+    ids = numpy.arange(vertex_num)
+    lattice = numpy.stack((ids % side, ids // side % side, ids // (side * side)), axis=1)
+    edge_chunks = []
+    for axis, step in enumerate((1, side, side * side)):
+        connected = (lattice[:, axis] < side - 1) & (ids + step < vertex_num)
+        edge_chunks.append(numpy.stack((ids[connected], ids[connected] + step), axis=1))
+    return GraphData(side, 45, 90, 225, (lattice - side // 2).astype(float), numpy.concatenate(edge_chunks))
+
+
+def produce_geometric_graph(vertex_num, rng):
+    # uniform random integer points, every two closer than the radius that gives GEOMETRIC_DEGREE neighbours
+    # on average are connected, the pairs are searched in the cells of a grid as wide as the radius
+    from graph_io import GraphData
+    positions = rng.integers(-GEOMETRIC_MAX_VALUE, GEOMETRIC_MAX_VALUE + 1, (vertex_num, 3)).astype(float)
+    radius = 2 * GEOMETRIC_MAX_VALUE * (GEOMETRIC_DEGREE / (vertex_num * 4 / 3 * numpy.pi)) ** (1 / 3)
+    # one empty cell around the grid, so the cells next to any cell exist
+    cells = ((positions + GEOMETRIC_MAX_VALUE) // radius).astype(numpy.int64) + 1
+    cell_side = int(cells.max()) + 2
+    cell_keys = (cells[:, 0] * cell_side + cells[:, 1]) * cell_side + cells[:, 2]
+    order = numpy.argsort(cell_keys, kind="stable")
+    sorted_keys = cell_keys[order]
+    cell_counts = numpy.bincount(sorted_keys, minlength=cell_side ** 3)
+    cell_starts = numpy.concatenate(([0], numpy.cumsum(cell_counts)[:-1]))
+    sorted_positions = positions[order]
+    sorted_indexes = numpy.arange(vertex_num)
+    edge_chunks = []
+    # the cell itself and half of the cells around it, so every pair of cells is searched once
+    for dx, dy, dz in [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                       if (dx, dy, dz) >= (0, 0, 0)]:
+        neighbour_keys = sorted_keys + (dx * cell_side + dy) * cell_side + dz
+        starts, counts = cell_starts[neighbour_keys], cell_counts[neighbour_keys]
+        for slot in range(int(counts.max())):
+            candidates = starts + slot
+            found = slot < counts
+            if (dx, dy, dz) == (0, 0, 0):
+                found &= candidates > sorted_indexes
+            candidates = numpy.where(found, candidates, 0)
+            distances = numpy.linalg.norm(sorted_positions[candidates] - sorted_positions, axis=1)
+            connected = found & (distances < radius)
+            edge_chunks.append(numpy.stack((order[connected], order[candidates[connected]]), axis=1))
+    return GraphData(GEOMETRIC_MAX_VALUE, 45, 90, 225, positions, numpy.concatenate(edge_chunks))
+
+
+def produce_clique_graph(vertex_num, rng):
+    # groups of CLIQUE_SIZE vertices around random centers, every vertex connected to every other of its group
+    from graph_io import GraphData
+    centers = rng.integers(-GEOMETRIC_MAX_VALUE + CLIQUE_SPREAD, GEOMETRIC_MAX_VALUE - CLIQUE_SPREAD + 1,
+                           (-(-vertex_num // CLIQUE_SIZE), 3))
+    positions = numpy.repeat(centers, CLIQUE_SIZE, axis=0)[:vertex_num] + \
+        rng.integers(-CLIQUE_SPREAD, CLIQUE_SPREAD + 1, (vertex_num, 3))
+    firsts, seconds = numpy.triu_indices(CLIQUE_SIZE, 1)
+    group_starts = numpy.arange(0, vertex_num, CLIQUE_SIZE)[:, None]
+    edges = numpy.stack(((group_starts + firsts).ravel(), (group_starts + seconds).ravel()), axis=1)
+    edges = edges[edges[:, 1] < vertex_num]
+    return GraphData(GEOMETRIC_MAX_VALUE, 45, 90, 225, positions.astype(float), edges)
+
+
+GRAPH_GENERATORS = {"grid": produce_grid_graph, "geometric": produce_geometric_graph, "clique": produce_clique_graph}
+
+
+def measure(function, repeat, setup=None):
+    # the best of the runs, the others were slowed down by something else on the machine
+    best_seconds = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start_time = time.perf_counter()
+        function()
+        best_seconds = min(best_seconds, time.perf_counter() - start_time)
+    return best_seconds
+
+
+def benchmark_graph(graph_data, work_dir, repeat):
+    import main
+    import pygame
+    from graph_io import load_graph, save_graph, save_as_output
+    from graph_store import GraphStore, EdgeIndex
+    from projection import produce_projection_basis, produce_2d_positions_from_3d_positions
+
+    input_file_path = os.path.join(work_dir, "input.csv")
+    save_graph(input_file_path, graph_data.positions, graph_data.edges, graph_data.x_axes_alpha,
+               graph_data.y_axes_alpha, graph_data.z_axes_alpha, graph_data.max_value)
+    graph_store = GraphStore()
+    edge_index = EdgeIndex()
+    max_value = graph_data.max_value
+
+    def load():
+        # what the visualiser does with a file from Get Input
+        loaded_data = load_graph(input_file_path)
+        new_vertex_ids = graph_store.load_positions(loaded_data.positions)
+        edge_index.clear()
+        edge_index.add_edges(new_vertex_ids[loaded_data.edges])
+
+    # a store of its own, clamping changes the coordinates the other phases work on
+    clamp_store = GraphStore()
+
+    def reload_positions():
+        clamp_store.load_positions(graph_data.positions)
+
+    def clamp():
+        # to a quarter of the maximum value, so there are coordinates to clip in every generated graph
+        clamp_store.clamp(max_value // 4)
+
+    projection_basis = produce_projection_basis(graph_data.x_axes_alpha, graph_data.y_axes_alpha,
+                                                graph_data.z_axes_alpha)
+
+    def project():
+        graph_store.positions_2d[:] = produce_2d_positions_from_3d_positions(
+            graph_store.positions, projection_basis, max_value, main.AXES_LENGTH, main.GRAPH_CENTER_X,
+            main.GRAPH_CENTER_Y)
+
+    main.x_axes.set_positions(graph_data.x_axes_alpha)
+    main.y_axes.set_positions(graph_data.y_axes_alpha)
+    main.z_axes.set_positions(graph_data.z_axes_alpha)
+
+    def draw_frame():
+        edge_rows = graph_store.indexes_of(edge_index.edge_array())
+        main.SCREEN.fill(main.BG_COLOR)
+        main.draw_axes(main.SCREEN)
+        main.draw_dots(main.SCREEN, graph_store, edge_rows)
+        pygame.display.update()
+
+    def save():
+        save_as_output(os.path.join(work_dir, "output.csv"), graph_store, edge_index, graph_data.x_axes_alpha,
+                       graph_data.y_axes_alpha, graph_data.z_axes_alpha, max_value)
+
+    phase_seconds = {"load": measure(load, repeat)}
+    phase_seconds["clamp"] = measure(clamp, repeat, reload_positions)
+    phase_seconds["projection"] = measure(project, repeat)
+    phase_seconds["frame"] = measure(draw_frame, repeat)
+    phase_seconds["save"] = measure(save, repeat)
+    return phase_seconds
+
+
+def run_benchmarks(generator_names, sizes, repeat):
+    for generator_name in generator_names:
+        for vertex_num in sizes:
+            graph_data = GRAPH_GENERATORS[generator_name](vertex_num, numpy.random.default_rng(BENCHMARK_SEED))
+            with tempfile.TemporaryDirectory() as work_dir:
+                phase_seconds = benchmark_graph(graph_data, work_dir, repeat)
+            for phase in BENCHMARK_PHASES:
+                yield {"generator": generator_name, "vertices": vertex_num, "edges": len(graph_data.edges),
+                       "phase": phase, "seconds": phase_seconds[phase]}
+
+
+def produce_environment():
+    # what the timings depend on besides the code, results of different environments do not compare well
+    import pygame
+    try:
+        import pandas
+        csv_parser = f"pandas {pandas.__version__}"
+    except ImportError:
+        csv_parser = "csv module"
+    return {"python": platform.python_version(), "numpy": numpy.__version__, "pygame": pygame.version.ver,
+            "csv parser": csv_parser, "machine": platform.platform()}
+
+
+def compare_results(results, baseline_results, tolerance=REGRESSION_TOLERANCE):
+    # (result, baseline seconds, slower) for every result the baseline has one of the same graph and phase for
+    baseline_seconds = {(result["generator"], result["vertices"], result["phase"]): result["seconds"]
+                        for result in baseline_results}
+    comparisons = []
+    for result in results:
+        seconds = baseline_seconds.get((result["generator"], result["vertices"], result["phase"]))
+        if seconds is not None:
+            slower = result["seconds"] > seconds * (1 + tolerance) and \
+                result["seconds"] - seconds > REGRESSION_MIN_SECONDS
+            comparisons.append((result, seconds, slower))
+    return comparisons
+
+
+if __name__ == "__main__":
+    from graph_io import produce_output_file_path
+    parser = argparse.ArgumentParser(description="Times loading, clamping, projecting, drawing and saving of "
+                                                 "generated graphs without a window.")
+    parser.add_argument("-g", "--generators", nargs="+", choices=list(GRAPH_GENERATORS),
+                        default=list(GRAPH_GENERATORS))
+    parser.add_argument("-s", "--sizes", nargs="+", type=int, default=list(BENCHMARK_SIZES), help="vertex numbers")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="runs of every phase, the best one counts")
+    parser.add_argument("-o", "--output", default=None, help="JSON file, outputs/benchmark_<n>.json by default")
+    parser.add_argument("-b", "--baseline", default=None,
+                        help="JSON file of an earlier run to compare with, exits with 1 when a phase got slower")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="how much slower than the baseline a phase may get, 0.25 is 25%%")
+    arguments = parser.parse_args()
+
+    print(f"{'graph':<12}{'vertices':>10}{'edges':>10}{'phase':>12}{'ms':>12}")
+    results = []
+    for result in run_benchmarks(arguments.generators, arguments.sizes, arguments.repeat):
+        results.append(result)
+        print(f"{result['generator']:<12}{result['vertices']:>10}{result['edges']:>10}{result['phase']:>12}"
+              f"{result['seconds'] * 1000:>12.2f}")
+
+    report = {**produce_environment(), "repeat": arguments.repeat, "results": results}
+    output_file_path = arguments.output
+    if output_file_path is None:
+        outputs_dir = os.path.join(SCRIPT_DIR, "outputs")
+        os.makedirs(outputs_dir, exist_ok=True)
+        output_file_path = produce_output_file_path(outputs_dir, "json", "benchmark")
+    with open(output_file_path, "w") as file:
+        json.dump(report, file, indent=1)
+    print(f"results written to {output_file_path}")
+
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as file:
+            baseline_report = json.load(file)
+        comparisons = compare_results(report["results"], baseline_report["results"], arguments.tolerance)
+        print(f"{'graph':<12}{'vertices':>10}{'phase':>12}{'baseline ms':>14}{'ms':>12}{'ratio':>8}")
+        for result, baseline_seconds, slower in comparisons:
+            ratio = result["seconds"] / baseline_seconds if baseline_seconds else float("inf")
+            print(f"{result['generator']:<12}{result['vertices']:>10}{result['phase']:>12}"
+                  f"{baseline_seconds * 1000:>14.2f}{result['seconds'] * 1000:>12.2f}{ratio:>8.2f}"
+                  f"{'  slower' if slower else ''}")
+        regression_num = sum(slower for _, _, slower in comparisons)
+        print(f"{regression_num} of {len(comparisons)} phases slower than the baseline")
+        if regression_num:
+            sys.exit(1)
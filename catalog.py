@@ -0,0 +1,78 @@
+import os
+import threading
+import numpy
+from collections import OrderedDict
+from graph_io import list_graph_files, load_graph
+
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+
+def array_footprint(array):
+    # an array mapped from a file, or a view of one, is read from the file again when its pages are needed instead
+    # of taking memory
+    base = array
+    while isinstance(base, numpy.ndarray):
+        if isinstance(base, numpy.memmap):
+            return 0
+        base = base.base
+    return array.nbytes
+
+
+def graph_footprint(graph_data):
+    return array_footprint(graph_data.positions) + array_footprint(graph_data.edges)
+
+
+class InputCatalog:
+
+    # indexes a directory of graph files and keeps the parsed graphs in an LRU cache bounded by their total size,
+    # a cached graph is only used while the file still has the modification time and size it was parsed with
+    def __init__(self, directory, max_cache_bytes=DEFAULT_CACHE_BYTES, load_function=load_graph):
+        self.directory = directory
+        self.max_cache_bytes = max_cache_bytes
+        self.load_function = load_function
+        self.file_names = []
+        self.directory_mtime_ns = None
+        self.cache = OrderedDict()   # path: (mtime_ns, size, graph_data, footprint)
+        self.cache_bytes = 0
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        # one stat call per lookup, the directory itself is only listed again when its contents changed
+        directory_mtime_ns = os.stat(self.directory).st_mtime_ns
+        if directory_mtime_ns != self.directory_mtime_ns:
+            self.file_names = sorted(list_graph_files(self.directory))
+            self.directory_mtime_ns = directory_mtime_ns
+            with self.lock:
+                for input_file_path in [path for path in self.cache
+                                        if os.path.basename(path) not in self.file_names]:
+                    self._forget(input_file_path)
+        return self.file_names
+
+    def __len__(self):
+        return len(self.refresh())
+
+    def path_at(self, index):
+        return os.path.join(self.directory, self.refresh()[index])
+
+    def _forget(self, input_file_path):
+        self.cache_bytes -= self.cache.pop(input_file_path)[3]
+
+    def load(self, input_file_path):
+        file_stat = os.stat(input_file_path)
+        with self.lock:
+            cached = self.cache.get(input_file_path)
+            if cached is not None:
+                if cached[:2] == (file_stat.st_mtime_ns, file_stat.st_size):
+                    self.cache.move_to_end(input_file_path)
+                    return cached[2]
+                self._forget(input_file_path)
+        graph_data = self.load_function(input_file_path)
+        footprint = graph_footprint(graph_data)
+        with self.lock:
+            if input_file_path in self.cache:
+                self._forget(input_file_path)
+            self.cache[input_file_path] = (file_stat.st_mtime_ns, file_stat.st_size, graph_data, footprint)
+            self.cache_bytes += footprint
+            while self.cache_bytes > self.max_cache_bytes:
+                self._forget(next(iter(self.cache)))
+        return graph_data
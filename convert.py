@@ -0,0 +1,26 @@
+import argparse
+from graph_io import IMPORT_FILE_EXTENSIONS, load_graph, save_graph
+
+
+def convert(input_file_path, output_file_path, max_value=None, quantize=False):
+    if input_file_path.lower().endswith(IMPORT_FILE_EXTENSIONS):
+        from importers import import_graph
+        graph_data = import_graph(input_file_path, max_value, quantize)
+    else:
+        graph_data = load_graph(input_file_path)
+    save_graph(output_file_path, graph_data.positions, graph_data.edges, graph_data.x_axes_alpha,
+               graph_data.y_axes_alpha, graph_data.z_axes_alpha, graph_data.max_value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts a graph file to .csv or .g3d, OBJ, PLY and edge list "
+                                                 "files are imported on the way.")
+    parser.add_argument("input_file", help=".csv, .g3d, .obj, .ply, .edges or .edgelist")
+    parser.add_argument("output_file", help=".csv or .g3d")
+    parser.add_argument("--max-value", type=int, default=None,
+                        help="maximum value of an imported graph, its coordinates are scaled until the largest one is "
+                             "it, 80 by default")
+    parser.add_argument("--quantize", action="store_true",
+                        help="round the coordinates of an imported graph to whole numbers like the dot sliders")
+    arguments = parser.parse_args()
+    convert(arguments.input_file, arguments.output_file, arguments.max_value, arguments.quantize)
@@ -0,0 +1,90 @@
+import csv
+import time
+import numpy
+
+PROFILE_HISTORY = 600   # drawn frames kept
+PROFILE_PHASES = ("events", "mechanics", "projection", "gui", "display")
+PHASE_EVENTS, PHASE_MECHANICS, PHASE_PROJECTION, PHASE_GUI, PHASE_DISPLAY = range(len(PROFILE_PHASES))
+PROFILE_COUNTERS = ("draw calls", "edges drawn", "dots drawn")
+DRAW_CALLS, EDGES_DRAWN, DOTS_DRAWN = range(len(PROFILE_COUNTERS))
+
+
+class FrameProfiler:
+
+    # the phase times and draw counts of the last drawn frames in ring buffers, every method returns right away
+    # while the profiler is disabled
+    def __init__(self, history=PROFILE_HISTORY):
+        self.enabled = False
+        self.phase_times = numpy.zeros((history, len(PROFILE_PHASES)))
+        self.counts = numpy.zeros((history, len(PROFILE_COUNTERS)), dtype=numpy.int64)
+        self.frame_end_times = numpy.zeros(history)
+        self.frame_num = 0
+        self.frame_phase_times = [0.0] * len(PROFILE_PHASES)
+        self.frame_counts = [0] * len(PROFILE_COUNTERS)
+        self.last_time = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.start_frame()
+
+    def start_frame(self):
+        if self.enabled:
+            self.frame_phase_times = [0.0] * len(PROFILE_PHASES)
+            self.frame_counts = [0] * len(PROFILE_COUNTERS)
+            self.last_time = time.perf_counter()
+
+    def resume(self):
+        # the time since the last phase ended is not counted, like waiting for the frame rate
+        if self.enabled:
+            self.last_time = time.perf_counter()
+
+    def end_phase(self, phase):
+        if self.enabled:
+            now = time.perf_counter()
+            self.frame_phase_times[phase] += now - self.last_time
+            self.last_time = now
+
+    def count(self, counter, amount=1):
+        if self.enabled:
+            self.frame_counts[counter] += amount
+
+    def end_frame(self):
+        if self.enabled:
+            slot = self.frame_num % len(self.frame_end_times)
+            self.phase_times[slot] = self.frame_phase_times
+            self.counts[slot] = self.frame_counts
+            self.frame_end_times[slot] = self.last_time
+            self.frame_num += 1
+
+    def _ordered_slots(self):
+        history = len(self.frame_end_times)
+        first_frame = max(0, self.frame_num - history)
+        return numpy.arange(first_frame, self.frame_num) % history
+
+    def fps(self):
+        frame_end_times = self.frame_end_times[self._ordered_slots()]
+        if len(frame_end_times) < 2 or frame_end_times[-1] == frame_end_times[0]:
+            return 0.0
+        return (len(frame_end_times) - 1) / (frame_end_times[-1] - frame_end_times[0])
+
+    def percentiles(self, percents=(50, 99)):
+        # one row per phase, one column per percent, in milliseconds
+        phase_times = self.phase_times[self._ordered_slots()]
+        if len(phase_times) == 0:
+            return numpy.zeros((len(PROFILE_PHASES), len(percents)))
+        return numpy.percentile(phase_times, percents, axis=0).T * 1000
+
+    def last_counts(self):
+        if self.frame_num == 0:
+            return [0] * len(PROFILE_COUNTERS)
+        return self.counts[(self.frame_num - 1) % len(self.frame_end_times)].tolist()
+
+    def write_csv(self, file):
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(["frame", "end time s"] + [f"{phase} ms" for phase in PROFILE_PHASES] + list(PROFILE_COUNTERS))
+        slots = self._ordered_slots()
+        first_frame = self.frame_num - len(slots)
+        for frame, slot in enumerate(slots.tolist(), start=first_frame):
+            writer.writerow([frame, f"{self.frame_end_times[slot]:.6f}"] +
+                            [f"{phase_time * 1000:.3f}" for phase_time in self.phase_times[slot].tolist()] +
+                            self.counts[slot].tolist())
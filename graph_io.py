@@ -0,0 +1,178 @@
+import os
+import csv
+import struct
+import itertools
+import numpy
+from collections import namedtuple
+from graph_store import format_coordinate
+
+CSV_COLUMNS = ["no", "connections", "x", "y", "z", "x axes angle", "y axes angle", "z axes angle", "maximum value"]
+WRITE_CHUNK_SIZE = 65536
+READ_CHUNK_SIZE = 65536
+
+# .g3d: a 64 byte header, then the x, y and z coordinate rows as float64, then the (E, 2) int64 edge array
+G3D_MAGIC = b"G3DGRAPH"
+G3D_VERSION = 1
+G3D_HEADER = struct.Struct("<8sIQQiiii")
+G3D_HEADER_SIZE = 64
+IMPORT_FILE_EXTENSIONS = (".obj", ".ply", ".edges", ".edgelist")   # read by importers.py
+GRAPH_FILE_EXTENSIONS = (".csv", ".g3d") + IMPORT_FILE_EXTENSIONS
+
+# positions is an (N, 3) float array, edges an (E, 2) array of row indexes into it
+GraphData = namedtuple("GraphData", ["max_value", "x_axes_alpha", "y_axes_alpha", "z_axes_alpha", "positions", "edges"])
+
+
+def produce_output_file_path(outputs_dir, extension="csv", prefix="output"):
+    taken_file_names = set(os.listdir(outputs_dir))
+    output_no = 1
+    while f"{prefix}_{output_no}.{extension}" in taken_file_names: output_no += 1
+    return os.path.join(outputs_dir, f"{prefix}_{output_no}.{extension}")
+
+
+def produce_connection_groups(edge_rows, dot_num):
+    # every edge is written once, on the row of its lower end, in the order the edges were added
+    edge_rows = numpy.sort(numpy.asarray(edge_rows, dtype=numpy.int64).reshape(-1, 2), axis=1)
+    order = numpy.argsort(edge_rows[:, 0], kind="stable")
+    connected_nums = (edge_rows[order, 1] + 1).astype(str).tolist()
+    offsets = [0] + numpy.cumsum(numpy.bincount(edge_rows[:, 0], minlength=dot_num)).tolist()
+    return connected_nums, offsets
+
+
+def write_csv_rows(file, positions, edge_rows, x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value):
+    writer = csv.writer(file, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    dot_num = len(positions)
+    connected_nums, offsets = produce_connection_groups(edge_rows, dot_num)
+    for chunk_start in range(0, dot_num, WRITE_CHUNK_SIZE):
+        rows = []
+        chunk_positions = positions[chunk_start:chunk_start + WRITE_CHUNK_SIZE]
+        if numpy.array_equal(chunk_positions, numpy.rint(chunk_positions)):
+            chunk_positions = chunk_positions.astype(numpy.int64).tolist()
+        else:
+            chunk_positions = [[format_coordinate(value) for value in position]
+                               for position in chunk_positions.tolist()]
+        for index, (x, y, z) in enumerate(chunk_positions, start=chunk_start):
+            connections = "-".join(connected_nums[offsets[index]:offsets[index + 1]])
+            row = [index + 1, connections, x, y, z]
+            if index == 0:
+                row += [x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value]
+            else:
+                row += ["", "", "", ""]
+            rows.append(row)
+        writer.writerows(rows)
+
+
+def write_g3d(file, positions, edge_rows, x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value):
+    positions = numpy.asarray(positions, dtype="<f8").reshape(-1, 3)
+    edge_rows = numpy.asarray(edge_rows, dtype="<i8").reshape(-1, 2)
+    file.write(G3D_HEADER.pack(G3D_MAGIC, G3D_VERSION, len(positions), len(edge_rows),
+                               x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value).ljust(G3D_HEADER_SIZE, b"\0"))
+    numpy.ascontiguousarray(positions.T).tofile(file)
+    edge_rows.tofile(file)
+
+
+def save_graph(output_file_path, positions, edge_rows, x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value):
+    if output_file_path.endswith(".g3d"):
+        with open(output_file_path, "wb") as file:
+            write_g3d(file, positions, edge_rows, x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value)
+    else:
+        with open(output_file_path, "w", newline="") as file:
+            write_csv_rows(file, positions, edge_rows, x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value)
+
+
+def save_as_output(output_file_path, graph_store, edge_index,
+                   x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value):
+    edge_rows = graph_store.indexes_of(edge_index.edge_array())
+    save_graph(output_file_path, graph_store.positions, edge_rows,
+               x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value)
+
+
+def parse_connections(connections, first_index, edge_keys, edge_values):
+    for index, connection_nums in enumerate(connections, start=first_index):
+        if type(connection_nums) is not str:
+            continue
+        for num in connection_nums.split("-"):
+            index_to_connect = int(num) - 1
+            edge_key = (index, index_to_connect) if index < index_to_connect else (index_to_connect, index)
+            if not (index == index_to_connect or edge_key in edge_keys):
+                edge_keys.add(edge_key)
+                edge_values.append(index)
+                edge_values.append(index_to_connect)
+
+
+def load_graph_csv(input_file_path, chunk_size=READ_CHUNK_SIZE):
+    try:
+        import pandas   # most of the start time of the visualiser when imported up front, so only on first use
+    except ImportError:
+        return load_graph_csv_stdlib(input_file_path, chunk_size)
+    metadata = None
+    position_chunks = []
+    edge_keys = set()
+    edge_values = []
+    dot_num = 0
+    for chunk in pandas.read_csv(input_file_path, chunksize=chunk_size, dtype={"connections": str}):
+        if metadata is None:
+            metadata = [int(chunk[column].iloc[0])
+                        for column in ("maximum value", "x axes angle", "y axes angle", "z axes angle")]
+        position_chunks.append(chunk[["x", "y", "z"]].to_numpy(dtype=float))
+        parse_connections(chunk["connections"].tolist(), dot_num, edge_keys, edge_values)
+        dot_num += len(chunk)
+    positions = numpy.concatenate(position_chunks) if position_chunks else numpy.zeros((0, 3))
+    edges = numpy.array(edge_values, dtype=numpy.int64).reshape(-1, 2)
+    return GraphData(*metadata, positions, edges)
+
+
+def load_graph_csv_stdlib(input_file_path, chunk_size=READ_CHUNK_SIZE):
+    # the same parse with the csv module, for where pandas is not installed
+    metadata = None
+    position_chunks = []
+    edge_keys = set()
+    edge_values = []
+    dot_num = 0
+    with open(input_file_path, newline="") as file:
+        reader = csv.reader(file)
+        columns = next(reader)
+        position_columns = [columns.index(column) for column in ("x", "y", "z")]
+        connections_column = columns.index("connections")
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                break
+            if metadata is None:
+                metadata = [int(float(rows[0][columns.index(column)]))
+                            for column in ("maximum value", "x axes angle", "y axes angle", "z axes angle")]
+            position_chunks.append(numpy.array([[row[column] for column in position_columns] for row in rows],
+                                               dtype=float).reshape(-1, 3))
+            parse_connections([row[connections_column] or None for row in rows], dot_num, edge_keys, edge_values)
+            dot_num += len(rows)
+    positions = numpy.concatenate(position_chunks) if position_chunks else numpy.zeros((0, 3))
+    edges = numpy.array(edge_values, dtype=numpy.int64).reshape(-1, 2)
+    return GraphData(*metadata, positions, edges)
+
+
+def load_graph_g3d(input_file_path):
+    with open(input_file_path, "rb") as file:
+        magic, version, dot_num, edge_num, x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value = \
+            G3D_HEADER.unpack(file.read(G3D_HEADER.size))
+    if magic != G3D_MAGIC or version != G3D_VERSION:
+        raise ValueError(f"{input_file_path} is not a version {G3D_VERSION} .g3d graph file")
+    edges_offset = G3D_HEADER_SIZE + 3 * 8 * dot_num
+    # read only, a GraphStore copies the coordinates the first time it edits them
+    coordinates = numpy.memmap(input_file_path, dtype="<f8", mode="r", offset=G3D_HEADER_SIZE,
+                               shape=(3, dot_num)) if dot_num else numpy.zeros((3, 0))
+    edges = numpy.memmap(input_file_path, dtype="<i8", mode="r", offset=edges_offset,
+                         shape=(edge_num, 2)) if edge_num else numpy.zeros((0, 2), dtype=numpy.int64)
+    return GraphData(max_value, x_axes_alpha, y_axes_alpha, z_axes_alpha, coordinates.T, edges)
+
+
+def list_graph_files(directory):
+    return [file_name for file_name in os.listdir(directory) if file_name.lower().endswith(GRAPH_FILE_EXTENSIONS)]
+
+
+def load_graph(input_file_path):
+    if input_file_path.lower().endswith(".g3d"):
+        return load_graph_g3d(input_file_path)
+    if input_file_path.lower().endswith(IMPORT_FILE_EXTENSIONS):
+        from importers import import_graph   # it builds on this module
+        return import_graph(input_file_path)
+    return load_graph_csv(input_file_path)
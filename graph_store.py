@@ -0,0 +1,281 @@
+import numpy
+
+DOT_CHOSEN = 1
+DOT_SELECTED_TO_CONNECT = 2
+ID_CAPACITY = 16   # length of the id table of an empty store
+
+
+class GraphStore:
+
+    def __init__(self, capacity=ID_CAPACITY):
+        self.coordinates = numpy.zeros((3, capacity))   # x, y and z rows
+        self.coordinates_2d = numpy.zeros((capacity, 2), dtype=int)
+        self.vertex_ids = numpy.zeros(capacity, dtype=numpy.int64)
+        self.flags = numpy.zeros(capacity, dtype=numpy.uint8)
+        self.indexes_of_ids = numpy.full(capacity, -1, dtype=numpy.int64)
+        self.size = 0
+        self.next_id = 0
+        self.ids_version = 0   # grows whenever vertices are added, removed or replaced, as ids are reused after a clear
+        self.coordinates_shared = False
+        self.version = 0   # grows with every change
+        self.positions_version = 0   # grows with changes of the coordinates or of the vertex order
+        self.layout_version = 0   # grows with the same changes, except single vertices moved by set_position
+        self.moved_vertex_ids = set()   # the vertices set_position moved since the layout last changed
+
+    def _changed(self, positions_changed=True, moved_vertex_id=None):
+        self.version += 1
+        if positions_changed:
+            self.positions_version += 1
+            if moved_vertex_id is None:
+                self.layout_version += 1
+                self.moved_vertex_ids.clear()
+            else:
+                self.moved_vertex_ids.add(moved_vertex_id)
+
+    def take_moved_vertex_ids(self):
+        moved_vertex_ids = list(self.moved_vertex_ids)
+        self.moved_vertex_ids.clear()
+        return moved_vertex_ids
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def positions(self):
+        return self.coordinates[:, :self.size].T
+
+    @property
+    def positions_2d(self):
+        return self.coordinates_2d[:self.size]
+
+    @property
+    def selection(self):
+        return self.flags[:self.size]
+
+    @property
+    def ids(self):
+        return self.vertex_ids[:self.size]
+
+    def reserve(self, capacity):
+        if capacity <= len(self.vertex_ids):
+            return
+        capacity = max(capacity, 2 * len(self.vertex_ids))
+        coordinates = numpy.zeros((3, capacity))
+        coordinates[:, :self.size] = self.coordinates[:, :self.size]
+        coordinates_2d = numpy.zeros((capacity, 2), dtype=int)
+        coordinates_2d[:self.size] = self.coordinates_2d[:self.size]
+        vertex_ids = numpy.zeros(capacity, dtype=numpy.int64)
+        vertex_ids[:self.size] = self.vertex_ids[:self.size]
+        flags = numpy.zeros(capacity, dtype=numpy.uint8)
+        flags[:self.size] = self.flags[:self.size]
+        self.coordinates, self.coordinates_2d = coordinates, coordinates_2d
+        self.vertex_ids, self.flags = vertex_ids, flags
+        self.coordinates_shared = False
+
+    def _own_coordinates(self):
+        # coordinates taken over by load_positions are copied the first time they are written to
+        if self.coordinates_shared:
+            self.coordinates = numpy.array(self.coordinates)
+            self.coordinates_shared = False
+
+    def _reserve_ids(self, id_num):
+        if self.next_id + id_num <= len(self.indexes_of_ids):
+            return
+        indexes_of_ids = numpy.full(max(self.next_id + id_num, 2 * len(self.indexes_of_ids)), -1, dtype=numpy.int64)
+        indexes_of_ids[:self.next_id] = self.indexes_of_ids[:self.next_id]
+        self.indexes_of_ids = indexes_of_ids
+
+    def add_vertex(self, position=(0, 0, 0)):
+        return int(self.add_vertices([position])[0])
+
+    def add_vertices(self, positions):
+        positions = numpy.asarray(positions, dtype=float).reshape(-1, 3)
+        vertex_num = len(positions)
+        self.reserve(self.size + vertex_num)
+        self._own_coordinates()
+        self._reserve_ids(vertex_num)
+        new_ids = numpy.arange(self.next_id, self.next_id + vertex_num)
+        new_indexes = numpy.arange(self.size, self.size + vertex_num)
+        self.coordinates[:, new_indexes] = positions.T
+        self.coordinates_2d[new_indexes] = 0
+        self.vertex_ids[new_indexes] = new_ids
+        self.flags[new_indexes] = 0
+        self.indexes_of_ids[new_ids] = new_indexes
+        self.size += vertex_num
+        self.next_id += vertex_num
+        self.ids_version += 1
+        self._changed()
+        return new_ids
+
+    def load_positions(self, positions):
+        # replaces every vertex, a (3, N) array seen through its (N, 3) transpose is taken over without a copy,
+        # so memory mapped files are only read from disk where they are used and cached graphs stay untouched
+        positions = numpy.asarray(positions, dtype=float).reshape(-1, 3)
+        coordinates = numpy.ascontiguousarray(positions.T)
+        vertex_num = coordinates.shape[1]
+        self.clear()
+        self._reserve_ids(vertex_num)
+        new_ids = numpy.arange(self.next_id, self.next_id + vertex_num)
+        self.coordinates = coordinates
+        self.coordinates_2d = numpy.zeros((vertex_num, 2), dtype=int)
+        self.vertex_ids = new_ids.copy()
+        self.flags = numpy.zeros(vertex_num, dtype=numpy.uint8)
+        self.indexes_of_ids[new_ids] = numpy.arange(vertex_num)
+        self.size = vertex_num
+        self.next_id += vertex_num
+        self.ids_version += 1
+        self.coordinates_shared = numpy.may_share_memory(coordinates, positions)
+        self._changed()
+        return new_ids
+
+    def remove_vertex(self, vertex_id):
+        index = self.index_of(vertex_id)
+        last = self.size - 1
+        self._own_coordinates()
+        # the order is kept, it is both the panel order and the "no" column of saved files
+        self.coordinates[:, index:last] = self.coordinates[:, index + 1:self.size]
+        self.coordinates_2d[index:last] = self.coordinates_2d[index + 1:self.size]
+        self.vertex_ids[index:last] = self.vertex_ids[index + 1:self.size]
+        self.flags[index:last] = self.flags[index + 1:self.size]
+        self.indexes_of_ids[self.vertex_ids[index:last]] -= 1
+        self.indexes_of_ids[vertex_id] = -1
+        self.size = last
+        self.ids_version += 1
+        self._changed()
+
+    def clear(self):
+        # ids start over from 0, so the id table does not keep growing with every graph loaded
+        self.indexes_of_ids = numpy.full(ID_CAPACITY, -1, dtype=numpy.int64)
+        self.size = 0
+        self.next_id = 0
+        self.ids_version += 1
+        self._changed()
+
+    def index_of(self, vertex_id):
+        return int(self.indexes_of_ids[vertex_id])
+
+    def indexes_of(self, vertex_ids):
+        return self.indexes_of_ids[vertex_ids]
+
+    def get_position(self, vertex_id):
+        return tuple(self.coordinates[:, self.index_of(vertex_id)].tolist())
+
+    def set_position(self, vertex_id, position):
+        index = self.index_of(vertex_id)
+        if self.coordinates[:, index].tolist() == list(position):
+            return
+        self._own_coordinates()
+        self.coordinates[:, index] = position
+        self._changed(moved_vertex_id=vertex_id)
+
+    def get_position_2d(self, vertex_id):
+        return tuple(self.coordinates_2d[self.index_of(vertex_id)].tolist())
+
+    def has_flag(self, vertex_id, flag):
+        return bool(self.flags[self.index_of(vertex_id)] & flag)
+
+    def set_flag(self, vertex_id, flag, value):
+        index = self.index_of(vertex_id)
+        if bool(self.flags[index] & flag) == bool(value):
+            return
+        if value:
+            self.flags[index] |= flag
+        else:
+            self.flags[index] &= 0xFF ^ flag
+        self._changed(positions_changed=False)
+
+    def clear_flag(self, flag):
+        flags = self.flags[:self.size]
+        if (flags & flag).any():
+            flags &= 0xFF ^ flag
+            self._changed(positions_changed=False)
+
+    def clamp(self, max_value):
+        coordinates = self.coordinates[:, :self.size]
+        # only written to when something is out of range, shared coordinates are not copied for nothing
+        if self.size and (coordinates.min() < -max_value or coordinates.max() > max_value):
+            self._own_coordinates()
+            coordinates = self.coordinates[:, :self.size]
+            numpy.clip(coordinates, -max_value, max_value, out=coordinates)
+            self._changed()
+
+
+class EdgeIndex:
+
+    def __init__(self):
+        self.edges = {}   # normalized (smaller id, bigger id) pairs, kept in the order they were added
+        self.adjacency = {}
+        self.version = 0
+        self._edge_array = numpy.zeros((0, 2), dtype=numpy.int64)
+        self._edge_array_version = 0
+
+    def __len__(self):
+        return len(self.edges)
+
+    def __iter__(self):
+        return iter(self.edges)
+
+    def __contains__(self, edge):
+        return normalize_edge(*edge) in self.edges
+
+    def add(self, vertex_id_1, vertex_id_2):
+        edge = normalize_edge(vertex_id_1, vertex_id_2)
+        if vertex_id_1 == vertex_id_2 or edge in self.edges:
+            return False
+        self.edges[edge] = None
+        self.adjacency.setdefault(vertex_id_1, set()).add(vertex_id_2)
+        self.adjacency.setdefault(vertex_id_2, set()).add(vertex_id_1)
+        self.version += 1
+        return True
+
+    def add_edges(self, edge_ids):
+        for vertex_id_1, vertex_id_2 in numpy.asarray(edge_ids).reshape(-1, 2).tolist():
+            self.add(vertex_id_1, vertex_id_2)
+
+    def remove(self, vertex_id_1, vertex_id_2):
+        edge = normalize_edge(vertex_id_1, vertex_id_2)
+        if edge not in self.edges:
+            return False
+        del self.edges[edge]
+        self.adjacency[vertex_id_1].discard(vertex_id_2)
+        self.adjacency[vertex_id_2].discard(vertex_id_1)
+        self.version += 1
+        return True
+
+    def toggle(self, vertex_id_1, vertex_id_2):
+        if self.remove(vertex_id_1, vertex_id_2):
+            return False
+        return self.add(vertex_id_1, vertex_id_2)
+
+    def remove_vertex(self, vertex_id):
+        for neighbour_id in self.adjacency.pop(vertex_id, ()):
+            self.adjacency[neighbour_id].discard(vertex_id)
+            del self.edges[normalize_edge(vertex_id, neighbour_id)]
+            self.version += 1
+
+    def neighbours(self, vertex_id):
+        return self.adjacency.get(vertex_id, set())
+
+    def clear(self):
+        self.edges = {}
+        self.adjacency = {}
+        self.version += 1
+
+    def edge_array(self):
+        if self._edge_array_version != self.version:
+            self._edge_array = numpy.fromiter((vertex_id for edge in self.edges for vertex_id in edge),
+                                              dtype=numpy.int64, count=2 * len(self.edges)).reshape(-1, 2)
+            self._edge_array_version = self.version
+        return self._edge_array
+
+
+def normalize_edge(vertex_id_1, vertex_id_2):
+    if vertex_id_1 < vertex_id_2:
+        return vertex_id_1, vertex_id_2
+    return vertex_id_2, vertex_id_1
+
+
+def format_coordinate(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return str(value)
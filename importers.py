@@ -0,0 +1,310 @@
+import math
+import struct
+import itertools
+import numpy
+from graph_io import GraphData, READ_CHUNK_SIZE
+
+# the largest value the maximum value slider of the visualiser takes, the dot sliders go in steps of 1
+MAX_VALUE_MAX = 80
+COORDINATE_SEQUENCE = 1
+IMPORT_AXES_ALPHAS = (330, 90, 210)   # the angles Reset Graph turns the axes to
+OBJ_EXTENSIONS = (".obj",)
+PLY_EXTENSIONS = (".ply",)
+EDGE_LIST_EXTENSIONS = (".edges", ".edgelist")
+PLY_TYPES = {"char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1", "short": "i2", "int16": "i2",
+             "ushort": "u2", "uint16": "u2", "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+             "float": "f4", "float32": "f4", "double": "f8", "float64": "f8"}
+PLY_FORMATS = {"ascii": None, "binary_little_endian": "<", "binary_big_endian": ">"}
+
+
+class RowChunks:
+
+    # rows gathered in a python list and packed into a numpy array every chunk_size rows, so no more than one
+    # chunk of python numbers is held at a time however long the file is
+    def __init__(self, width, dtype, chunk_size=READ_CHUNK_SIZE):
+        self.width = width
+        self.dtype = dtype
+        self.chunk_size = chunk_size
+        self.values = []
+        self.chunks = []
+        self.row_num = 0
+
+    def add(self, row):
+        self.values.extend(row)
+        self.row_num += 1
+        if len(self.values) >= self.chunk_size * self.width:
+            self._flush()
+
+    def add_array(self, rows):
+        self._flush()
+        rows = numpy.asarray(rows, dtype=self.dtype).reshape(-1, self.width)
+        self.row_num += len(rows)
+        self.chunks.append(self.pack(rows))
+
+    def _flush(self):
+        if self.values:
+            self.chunks.append(self.pack(numpy.array(self.values, dtype=self.dtype).reshape(-1, self.width)))
+            self.values = []
+
+    def pack(self, rows):
+        return rows
+
+    def array(self):
+        self._flush()
+        if not self.chunks:
+            return numpy.zeros((0, self.width), dtype=self.dtype)
+        return numpy.concatenate(self.chunks)
+
+
+class EdgeChunks(RowChunks):
+
+    # vertex index pairs, every chunk is stored with its lower index first and without loops or repeated edges
+    def __init__(self, chunk_size=READ_CHUNK_SIZE):
+        super().__init__(2, numpy.int64, chunk_size)
+
+    def add_polygon(self, indexes, closed=True):
+        second_indexes = indexes[1:] + indexes[:1] if closed and len(indexes) > 2 else indexes[1:]
+        self.values.extend(itertools.chain.from_iterable(zip(indexes, second_indexes)))
+        self.row_num += len(second_indexes)
+        if len(self.values) >= self.chunk_size * self.width:
+            self._flush()
+
+    def pack(self, rows):
+        rows = numpy.sort(rows, axis=1)
+        return unique_edges(rows[rows[:, 0] != rows[:, 1]])
+
+    def edge_array(self, vertex_num, input_file_path):
+        edges = self.array()
+        if len(edges) and (edges.min() < 0 or edges.max() >= vertex_num):
+            raise ValueError(f"{input_file_path} connects vertices it does not have")
+        # the same edge may still be in two chunks
+        return unique_edges(edges) if len(self.chunks) > 1 else edges
+
+
+def unique_edges(edges):
+    # one int64 key per edge sorts much faster than the rows themselves
+    keys = edges[:, 0] * (1 << 32) + edges[:, 1]
+    return edges[numpy.unique(keys, return_index=True)[1]]
+
+
+def fit_positions(positions, max_value=None, quantize=False):
+    # scaled up or down until the largest coordinate is the maximum value, so the graph fills the view whatever
+    # units the file uses, by default the largest maximum value the slider takes, which leaves the finest grid for
+    # the coordinates rounded to the dot sliders when quantized
+    if max_value is None:
+        max_value = MAX_VALUE_MAX
+    largest = float(numpy.abs(positions).max()) if len(positions) else 0.0
+    if largest > 0:
+        positions = positions * (max_value / largest)
+    if quantize:
+        positions = numpy.rint(positions / COORDINATE_SEQUENCE) * COORDINATE_SEQUENCE
+    return positions, max_value
+
+
+def produce_imported_graph(input_file_path, positions, edges, max_value, quantize):
+    if len(positions) == 0:
+        raise ValueError(f"{input_file_path} has no vertices")
+    positions, max_value = fit_positions(positions, max_value, quantize)
+    return GraphData(max_value, *IMPORT_AXES_ALPHAS, positions, edges)
+
+
+def parse_obj_index(token, vertex_num):
+    # "7", "7/1" or "7/1/3", counted from 1, or from the last vertex so far when negative
+    index = int(token.split("/", 1)[0])
+    return index - 1 if index > 0 else vertex_num + index
+
+
+def load_graph_obj(input_file_path, max_value=None, quantize=False, chunk_size=READ_CHUNK_SIZE):
+    # the v lines are the vertices, the sides of every f polygon and l polyline are the edges
+    positions = RowChunks(3, float, chunk_size)
+    edges = EdgeChunks(chunk_size)
+    with open(input_file_path, errors="replace") as file:
+        for line in file:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == "v":
+                positions.add((float(parts[1]), float(parts[2]), float(parts[3])))
+            elif parts[0] in ("f", "l"):
+                edges.add_polygon([parse_obj_index(token, positions.row_num) for token in parts[1:]],
+                                  parts[0] == "f")
+    return produce_imported_graph(input_file_path, positions.array(),
+                                  edges.edge_array(positions.row_num, input_file_path), max_value, quantize)
+
+
+def read_ply_header(file, input_file_path):
+    # the format and the (name, count, properties) of every element, a property is (name, type) or
+    # (name, (count type, item type)) for a list
+    if file.readline().strip() != b"ply":
+        raise ValueError(f"{input_file_path} is not a PLY file")
+    ply_format = None
+    elements = []
+    for line in file:
+        parts = line.decode("ascii", "replace").split()
+        if not parts or parts[0] in ("comment", "obj_info"):
+            continue
+        if parts[0] == "end_header":
+            return ply_format, elements
+        if parts[0] == "format":
+            if parts[1] not in PLY_FORMATS:
+                raise ValueError(f"{input_file_path} has the unknown PLY format {parts[1]}")
+            ply_format = PLY_FORMATS[parts[1]]
+        elif parts[0] == "element":
+            elements.append((parts[1], int(parts[2]), []))
+        elif parts[0] == "property" and parts[1] == "list":
+            elements[-1][2].append((parts[4], (PLY_TYPES[parts[2]], PLY_TYPES[parts[3]])))
+        elif parts[0] == "property":
+            elements[-1][2].append((parts[2], PLY_TYPES[parts[1]]))
+    raise ValueError(f"{input_file_path} ends in its PLY header")
+
+
+def read_ply_ascii_records(file, properties, count):
+    # every record as a list of its property values, a list property as one list
+    for _ in range(count):
+        tokens = file.readline().split()
+        values = []
+        position = 0
+        for _, property_type in properties:
+            if type(property_type) is tuple:
+                item_num = int(tokens[position])
+                values.append([int(token) for token in tokens[position + 1:position + 1 + item_num]])
+                position += 1 + item_num
+            else:
+                values.append(float(tokens[position]))
+                position += 1
+        yield values
+
+
+def read_ply_binary_records(file, properties, count, byte_order):
+    structs = {property_type: struct.Struct(byte_order + numpy.dtype(property_type).char)
+               for _, property_type in properties if type(property_type) is not tuple}
+    for _ in range(count):
+        values = []
+        for _, property_type in properties:
+            if type(property_type) is tuple:
+                count_struct = struct.Struct(byte_order + numpy.dtype(property_type[0]).char)
+                item_num = count_struct.unpack(file.read(count_struct.size))[0]
+                item_dtype = numpy.dtype(property_type[1]).newbyteorder(byte_order)
+                values.append(numpy.frombuffer(file.read(item_num * item_dtype.itemsize), item_dtype).tolist())
+            else:
+                values.append(structs[property_type].unpack(file.read(structs[property_type].size))[0])
+        yield values
+
+
+def read_ply_binary_lists(file, count_type, item_type, count, byte_order, chunk_size):
+    # chunks of (N, K) arrays for an element of one list property, most meshes have only triangles or only quads,
+    # so a chunk is read as records of the size of its first one, from where a record of another size shows up
+    # one chunk is read a record at a time
+    count_dtype = numpy.dtype(count_type).newbyteorder(byte_order)
+    item_dtype = numpy.dtype(item_type).newbyteorder(byte_order)
+    properties = [("list", (count_type, item_type))]
+    while count:
+        start = file.tell()
+        item_num = int(numpy.frombuffer(file.read(count_dtype.itemsize), count_dtype)[0])
+        file.seek(start)
+        record_dtype = numpy.dtype([("count", count_dtype), ("items", item_dtype, (item_num,))])
+        record_num = min(chunk_size, count)
+        records = numpy.frombuffer(file.read(record_num * record_dtype.itemsize), record_dtype)
+        mismatches = numpy.flatnonzero(records["count"] != item_num)
+        uniform_num = int(mismatches[0]) if len(mismatches) else len(records)
+        yield records["items"][:uniform_num].reshape(uniform_num, item_num).astype(numpy.int64)
+        count -= uniform_num
+        file.seek(start + uniform_num * record_dtype.itemsize)
+        if uniform_num < record_num and count:
+            slow_num = min(chunk_size, count)
+            for values in read_ply_binary_records(file, properties, slow_num, byte_order):
+                yield values[0]
+            count -= slow_num
+
+
+def load_graph_ply(input_file_path, max_value=None, quantize=False, chunk_size=READ_CHUNK_SIZE):
+    # the x, y and z of the vertex element, the sides of the polygons of the face element and the vertex1 and
+    # vertex2 pairs of the edge element, ascii and binary, other elements and properties are read past
+    positions = RowChunks(3, float, chunk_size)
+    edges = EdgeChunks(chunk_size)
+    with open(input_file_path, "rb") as file:
+        ply_format, elements = read_ply_header(file, input_file_path)
+        for name, count, properties in elements:
+            property_names = [property_name for property_name, _ in properties]
+            all_fixed = all(type(property_type) is not tuple for _, property_type in properties)
+            if ply_format is not None and all_fixed:
+                # records of one size, read a chunk at a time into a structured array
+                record_dtype = numpy.dtype([(property_name, numpy.dtype(property_type).newbyteorder(ply_format))
+                                            for property_name, property_type in properties])
+                for chunk_start in range(0, count, chunk_size):
+                    record_num = min(chunk_size, count - chunk_start)
+                    records = numpy.frombuffer(file.read(record_num * record_dtype.itemsize), record_dtype)
+                    if name == "vertex":
+                        positions.add_array(numpy.stack([records[axis] for axis in "xyz"], axis=1))
+                    elif name == "edge":
+                        edges.add_array(numpy.stack((records["vertex1"], records["vertex2"]), axis=1))
+                continue
+            if ply_format is not None and name == "face" and len(properties) == 1:
+                for polygons in read_ply_binary_lists(file, *properties[0][1], count, ply_format, chunk_size):
+                    if type(polygons) is list:
+                        edges.add_polygon(polygons)
+                    elif polygons.shape[1] > 1:
+                        # the sides of a chunk of polygons of the same size, each closed back to its first vertex
+                        edges.add_array(numpy.stack((polygons, numpy.roll(polygons, -1, axis=1)), axis=2)
+                                        if polygons.shape[1] > 2 else polygons)
+                continue
+            if ply_format is None:
+                records = read_ply_ascii_records(file, properties, count)
+            else:
+                records = read_ply_binary_records(file, properties, count, ply_format)
+            if name == "vertex":
+                axes = [property_names.index(axis) for axis in "xyz"]
+                for values in records:
+                    positions.add([values[axis] for axis in axes])
+            elif name == "face":
+                polygon_property = property_names.index("vertex_indices" if "vertex_indices" in property_names
+                                                        else "vertex_index")
+                for values in records:
+                    edges.add_polygon(values[polygon_property])
+            elif name == "edge":
+                vertex_properties = property_names.index("vertex1"), property_names.index("vertex2")
+                for values in records:
+                    edges.add((int(values[vertex_properties[0]]), int(values[vertex_properties[1]])))
+            else:
+                for _ in records:
+                    pass
+    return produce_imported_graph(input_file_path, positions.array(),
+                                  edges.edge_array(positions.row_num, input_file_path), max_value, quantize)
+
+
+def produce_sphere_positions(vertex_num, radius):
+    # evenly spread over a sphere in the order of the vertices, a golden angle apart
+    ns = numpy.arange(vertex_num) + 0.5
+    heights = 1 - 2 * ns / max(vertex_num, 1)
+    rings = numpy.sqrt(1 - heights ** 2)
+    angles = numpy.pi * (3 - math.sqrt(5)) * ns
+    return radius * numpy.stack((rings * numpy.cos(angles), heights, rings * numpy.sin(angles)), axis=1)
+
+
+def load_graph_edge_list(input_file_path, max_value=None, quantize=False, chunk_size=READ_CHUNK_SIZE):
+    # "u v" lines, or "u,v", any more columns like weights are left out and lines starting with # or % are
+    # comments, the vertices are numbered in the order they first show up and spread over a sphere
+    vertex_indexes = {}
+    edges = EdgeChunks(chunk_size)
+    with open(input_file_path, errors="replace") as file:
+        for line in file:
+            parts = line.replace(",", " ").split()
+            if len(parts) < 2 or parts[0][0] in "#%":
+                continue
+            edges.add((vertex_indexes.setdefault(parts[0], len(vertex_indexes)),
+                       vertex_indexes.setdefault(parts[1], len(vertex_indexes))))
+    vertex_num = len(vertex_indexes)
+    radius = MAX_VALUE_MAX if max_value is None else max_value
+    return produce_imported_graph(input_file_path, produce_sphere_positions(vertex_num, radius),
+                                  edges.edge_array(vertex_num, input_file_path), max_value, quantize)
+
+
+def import_graph(input_file_path, max_value=None, quantize=False):
+    extension = input_file_path.lower()[input_file_path.rfind("."):]
+    if extension in OBJ_EXTENSIONS:
+        return load_graph_obj(input_file_path, max_value, quantize)
+    if extension in PLY_EXTENSIONS:
+        return load_graph_ply(input_file_path, max_value, quantize)
+    if extension in EDGE_LIST_EXTENSIONS:
+        return load_graph_edge_list(input_file_path, max_value, quantize)
+    raise ValueError(f"{input_file_path} is not an OBJ, PLY or edge list file")
@@ -0,0 +1,72 @@
+import pygame
+
+
+class InputDispatcher:
+
+    # routes the mouse events of a frame to the widget under the cursor instead of every widget asking pygame,
+    # regions are hit tested in the order they were added, and a press holds on to its widget until the release
+    def __init__(self):
+        self.regions = []   # (rect, target, resolve)
+        self.disabled_targets = set()
+        self.mouse_pos = (-1, -1)   # nowhere until the mouse first moves
+        self.mouse_pressed = False
+        self.pressed_target = None
+        self.presses = []   # (target, pos) of every press of the frame
+        self.clicks = []   # targets pressed and released on in the frame
+
+    def add(self, rect, target, resolve=None):
+        # resolve finds the target at a point of the rect among many small ones, like the dot rects of the panel,
+        # where it finds none the press goes to the target of the region itself
+        self.regions.append((rect, target, resolve))
+
+    def reset(self, region_num=0):
+        # keeps the first region_num regions and forgets everything the events did, the mouse is nowhere again
+        del self.regions[region_num:]
+        self.disabled_targets.clear()
+        self.mouse_pos = (-1, -1)
+        self.mouse_pressed = False
+        self.pressed_target = None
+        self.presses, self.clicks = [], []
+
+    def set_enabled(self, target, enabled):
+        if enabled:
+            self.disabled_targets.discard(target)
+        else:
+            self.disabled_targets.add(target)
+
+    def target_at(self, pos):
+        for rect, target, resolve in self.regions:
+            if target not in self.disabled_targets and rect.collidepoint(pos):
+                if resolve is not None:
+                    resolved_target = resolve(pos)
+                    if resolved_target is not None:
+                        return resolved_target
+                return target
+        return None
+
+    def dispatch(self, events):
+        # a press and its release are both seen even when they come between two frames
+        self.presses, self.clicks = [], []
+        for event in events:
+            if event.type == pygame.MOUSEMOTION:
+                self.mouse_pos = event.pos
+                if self.pressed_target is not None and hasattr(self.pressed_target, "drag"):
+                    self.pressed_target.drag(event.pos)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == pygame.BUTTON_LEFT:
+                self.mouse_pos = event.pos
+                self.mouse_pressed = True
+                self.pressed_target = self.target_at(event.pos)
+                self.presses.append((self.pressed_target, event.pos))
+                if hasattr(self.pressed_target, "press"):
+                    self.pressed_target.press(event.pos)
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == pygame.BUTTON_LEFT:
+                self.mouse_pos = event.pos
+                self.mouse_pressed = False
+                pressed_target, self.pressed_target = self.pressed_target, None
+                if hasattr(pressed_target, "release"):
+                    pressed_target.release(event.pos)
+                if pressed_target is not None and self.target_at(event.pos) is pressed_target:
+                    self.clicks.append(pressed_target)
+
+    def is_clicked(self, target):
+        return target in self.clicks
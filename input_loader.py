@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+from graph_io import load_graph
+
+
+class InputLoader:
+
+    # parses graph files on a worker thread so the window keeps drawing, and keeps one file prefetched
+    def __init__(self, load_function=load_graph):
+        self.load_function = load_function
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="input-loader")
+        self.loading_path = None
+        self.loading_future = None
+        self.prefetched_path = None
+        self.prefetched_future = None
+
+    @property
+    def is_loading(self):
+        return self.loading_future is not None
+
+    def request(self, input_file_path):
+        if input_file_path == self.prefetched_path:
+            self.loading_future = self.prefetched_future
+            self.prefetched_path, self.prefetched_future = None, None
+        else:
+            self.loading_future = self.executor.submit(self.load_function, input_file_path)
+        self.loading_path = input_file_path
+
+    def prefetch(self, input_file_path):
+        if input_file_path is None or input_file_path in (self.prefetched_path, self.loading_path):
+            return
+        if self.prefetched_future is not None:
+            self.prefetched_future.cancel()
+        self.prefetched_path = input_file_path
+        self.prefetched_future = self.executor.submit(self.load_function, input_file_path)
+
+    def take_loaded(self, wait=False):
+        # the loaded graph once it is ready, None while it is still loading or nothing was requested, a file that
+        # failed to load raises its error here once and is not loading any more
+        if self.loading_future is None or not (wait or self.loading_future.done()):
+            return None
+        loading_future = self.loading_future
+        self.loading_path, self.loading_future = None, None
+        return loading_future.result()
+
+    def forget(self):
+        if self.loading_future is not None:
+            self.loading_future.cancel()
+        if self.prefetched_future is not None:
+            self.prefetched_future.cancel()
+        self.loading_path, self.loading_future = None, None
+        self.prefetched_path, self.prefetched_future = None, None
+
+    def shutdown(self):
+        self.forget()
+        self.executor.shutdown(wait=False, cancel_futures=True)
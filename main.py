@@ -1,20 +1,47 @@
+from startup_profile import STARTUP_PROFILE
 import os
-import pandas
 import math
+import time
+import argparse
+import numpy
 import pygame
-
-pygame.init()
+from graph_store import GraphStore, EdgeIndex, DOT_CHOSEN, DOT_SELECTED_TO_CONNECT
+from catalog import InputCatalog
+from graph_io import produce_output_file_path, save_as_output
+from input_loader import InputLoader
+from render_cache import Layer, TextCache
+from input_dispatch import InputDispatcher
+from session import LiveSession, SessionRecorder, SessionState
+from spatial_index import UniformGrid, PointGrid
+from point_splat import SPLAT_MIN_DOTS, can_splat, splat_points
+from progressive import FRAME_BUDGET_SECONDS, ProgressiveSampler, produce_sample_mask, produce_edge_keys
+from frame_profiler import FrameProfiler, PROFILE_PHASES, PHASE_EVENTS, PHASE_MECHANICS, PHASE_PROJECTION, \
+    PHASE_GUI, PHASE_DISPLAY, DRAW_CALLS, EDGES_DRAWN, DOTS_DRAWN
+from projection import produce_projection_basis, produce_axes_geometry, produce_2d_positions_from_3d_positions, \
+    produce_visible_points, produce_visible_segments
+
+STARTUP_PROFILE.mark("imports")
+# only the pygame modules the visualiser uses, the audio and joystick ones are slow to start on some machines
+pygame.display.init()
+pygame.font.init()
+STARTUP_PROFILE.mark("pygame init")
 
 W = 1280   # screen width
 
 FONT_SMALL = pygame.font.Font(None, W // 64)
 FONT_MEDIUM = pygame.font.Font(None, 3 * W // 128)
 FONT_LARGE = pygame.font.Font(None, W // 32)
+TEXT_CACHE = TextCache()
+PROFILER = FrameProfiler()   # F3 shows it, F4 writes what it holds to outputs
+INPUT = InputDispatcher()
+STARTUP_PROFILE.mark("fonts")
 
 AXES_LENGTH, AXES_THICKNESS = W // 4, W // 256
 GRAPH_CENTER_X, GRAPH_CENTER_Y = 9 * W // 32, 9 * W // 32
 RECTS_CENTER_X, RECTS_CENTER_Y = 25 * W // 32, 3 * W // 16
 RECTS_CIRCLE_RADIUS, RECT_WIDTH = 9 * W // 64, W // 64
+PANEL_PAGE_SIZES, PANEL_DEFAULT_PAGE_SIZE = (16, 32, 64, 128, 256), 64   # vertices on one page of the panel
+PICK_RADIUS = AXES_THICKNESS * 3   # how far from a drawn dot a click in the graph still picks it
 
 BG_COLOR, BG_PANEL_COLOR = (191, 191, 191), (127, 127, 127)
 BUTTON_COLOR_1_1, BUTTON_COLOR_1_2 = (175, 175, 175), (167, 167, 167)
@@ -32,8 +59,10 @@ USER_INPUTS_DIR = os.path.join(SCRIPT_DIR, "user_inputs")
 
 SCREEN = pygame.display.set_mode((W, 9 * W // 16))
 BG_PANEL_RECT = pygame.rect.Rect(9 * W // 16, 0, 7 * W // 16, 9 * W // 16)
+GRAPH_AREA_RECT = pygame.rect.Rect(1, 1, 9 * W // 16 - 2, 9 * W // 16 - 2)
 CLOCK = pygame.time.Clock()
 pygame.display.set_caption("Third Dimensional Graph Visualiser")
+STARTUP_PROFILE.mark("display")
 
 
 class Button:
@@ -49,33 +78,15 @@ class Button:
         self.border_radius = border_radius
         self.body_rect = pygame.rect.Rect(x, y, width, height)
         self.text = text
-        self.text_surf = font.render(text, True, text_color)
+        self.text_surf = TEXT_CACHE.render(font, text, text_color)
         self.text_rect = self.text_surf.get_rect(center=self.body_rect.center)
-        self.press_allowed = True
-        self.pressed = False
-
-    def is_clicked(self):
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        if self.body_rect.collidepoint(pygame.mouse.get_pos()):
-            if mouse_pressed:
-                self.pressed = True
-            elif self.pressed and self.press_allowed:
-                self.pressed = False
-                return True
-        else:
-            self.pressed = False
-            if mouse_pressed:
-                self.press_allowed = False
-            else:
-                self.press_allowed = True
-        return False
 
     def draw(self, text):
         if not (text is None or self.text == text):
             self.text = text
-            self.text_surf = self.font.render(text, True, self.text_color)
+            self.text_surf = TEXT_CACHE.render(self.font, text, self.text_color)
             self.text_rect = self.text_surf.get_rect(center=self.body_rect.center)
-        if self.body_rect.collidepoint(pygame.mouse.get_pos()):
+        if self.body_rect.collidepoint(INPUT.mouse_pos):
             self.color = self.button_color_2
         else:
             self.color = self.button_color_1
@@ -95,10 +106,18 @@ button_get_input = Button(SCREEN, "Get Input", FONT_SMALL, 15 * W // 32, W // 32
                           BUTTON_COLOR_1_1, BUTTON_COLOR_1_2, TEXT_COLOR_1, W // 128)
 button_save_data = Button(SCREEN, "Save Data", FONT_SMALL, 15 * W // 32, 5 * W // 64, W // 16, W // 32,
                           BUTTON_COLOR_1_1, BUTTON_COLOR_1_2, TEXT_COLOR_1, W // 128)
+button_save_format = Button(SCREEN, "As CSV", FONT_SMALL, 25 * W // 64, 5 * W // 64, W // 16, W // 32,
+                            BUTTON_COLOR_1_1, BUTTON_COLOR_1_2, TEXT_COLOR_1, W // 128)
 button_new_dot = Button(SCREEN, "New Dot", FONT_MEDIUM, 39 * W // 64,  7 * W // 16, 3 * W // 32, W // 32,
                         BUTTON_COLOR_2_1, BUTTON_COLOR_2_2, TEXT_COLOR_2, W // 128)
 button_remove = Button(SCREEN, "Remove", FONT_MEDIUM, 39 * W // 64, W // 2, 3 * W // 32, W // 32,
                        BUTTON_COLOR_2_1, BUTTON_COLOR_2_2, TEXT_COLOR_2, W // 128)
+button_previous_page = Button(SCREEN, "<", FONT_MEDIUM, 37 * W // 64, W // 64, W // 32, W // 32,
+                              BUTTON_COLOR_2_1, BUTTON_COLOR_2_2, TEXT_COLOR_2, W // 128)
+button_next_page = Button(SCREEN, ">", FONT_MEDIUM, 61 * W // 64, W // 64, W // 32, W // 32,
+                          BUTTON_COLOR_2_1, BUTTON_COLOR_2_2, TEXT_COLOR_2, W // 128)
+buttons = [button_hide_graph, button_hide_dots, button_reset_graph, button_reset_all, button_get_input,
+           button_save_data, button_save_format, button_new_dot, button_remove, button_previous_page, button_next_page]
 
 
 class Slider:
@@ -122,28 +141,28 @@ class Slider:
         self.bar_rect = pygame.rect.Rect(left_x, middle_y - height // 2, width, height)
         self.holding = False
 
-    def mouse_collides_controller(self):
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-        distance = ((mouse_x - self.controller_x) ** 2 + (mouse_y - self.controller_y) ** 2) ** .5
+    def collides_controller(self, pos):
+        distance = ((pos[0] - self.controller_x) ** 2 + (pos[1] - self.controller_y) ** 2) ** .5
         if distance < self.circle_radius:
             return True
         return False
 
-    def movement(self):
-        mouse_pos = pygame.mouse.get_pos()
-        if pygame.mouse.get_pressed()[0]:
-            if self.mouse_collides_controller():
-                self.holding = True
-            if self.holding:
-                self.controller_x = mouse_pos[0]
-            elif self.bar_rect.collidepoint(mouse_pos):
-                self.controller_x = mouse_pos[0]
+    def press(self, pos):
+        # a press on the bar moves the controller under the mouse, so it is held either way
+        if self.collides_controller(pos) or self.bar_rect.collidepoint(pos):
+            self.holding = True
+            self.drag(pos)
+
+    def drag(self, pos):
+        if self.holding:
+            self.controller_x = pos[0]
             if self.controller_x < self.min_x:
                 self.controller_x = self.min_x
             elif self.controller_x > self.max_x:
                 self.controller_x = self.max_x
-        else:
-            self.holding = False
+
+    def release(self, pos):
+        self.holding = False
 
     def calculate_value(self):
         rounded_value = round(self.min_value + self.value_gap * (self.controller_x - self.min_x) / self.slide_length)
@@ -185,12 +204,27 @@ slider_dot_y_pos = Slider(SCREEN, -4, 4, 1, 49 * W // 64, 31 * W // 64, 3 * W //
                           BUTTON_COLOR_2_1, BUTTON_COLOR_2_2, TEXT_COLOR_2)
 slider_dot_z_pos = Slider(SCREEN, -4, 4, 1, 49 * W // 64, 33 * W // 64, 3 * W // 16, 3 * W // 384,
                           BUTTON_COLOR_2_1, BUTTON_COLOR_2_2, TEXT_COLOR_2)
-slider_x_axes_alpha.set_controller_pos_from_value(330)
-slider_y_axes_alpha.set_controller_pos_from_value(90)
-slider_z_axes_alpha.set_controller_pos_from_value(210)
-slider_dot_x_pos.set_controller_pos_from_value(0)
-slider_dot_y_pos.set_controller_pos_from_value(0)
-slider_dot_z_pos.set_controller_pos_from_value(0)
+sliders = [slider_max_value, slider_x_axes_alpha, slider_y_axes_alpha, slider_z_axes_alpha,
+           slider_dot_x_pos, slider_dot_y_pos, slider_dot_z_pos]
+dot_sliders = [slider_dot_x_pos, slider_dot_y_pos, slider_dot_z_pos]
+
+
+def reset_sliders():
+    slider_x_axes_alpha.set_controller_pos_from_value(330)
+    slider_y_axes_alpha.set_controller_pos_from_value(90)
+    slider_z_axes_alpha.set_controller_pos_from_value(210)
+    slider_dot_x_pos.set_controller_pos_from_value(0)
+    slider_dot_y_pos.set_controller_pos_from_value(0)
+    slider_dot_z_pos.set_controller_pos_from_value(0)
+    slider_max_value.set_controller_pos_from_value(4)
+
+
+reset_sliders()
+for button in buttons:
+    INPUT.add(button.body_rect, button)
+for slider in sliders:
+    INPUT.add(slider.bar_rect.inflate(2 * slider.circle_radius, 2 * slider.circle_radius), slider)
+WIDGET_REGION_NUM = len(INPUT.regions)   # the regions of the widgets, every run of main adds its own after them
 
 
 class Axes:
@@ -211,29 +245,22 @@ class Axes:
         self.slope = 90
 
     def set_positions(self, alpha):
-        x = self.radius * math.cos(alpha * math.pi / 180)
-        y = self.radius * math.sin(alpha * math.pi / 180)
-        start_x = self.center_x - x
-        start_y = self.center_y + y
-        end_x = self.center_x + x
-        end_y = self.center_y - y
-        self.start_pos = (start_x, start_y)
-        self.end_pos = (end_x, end_y)
-        d_x = (end_x - start_x)
-        d_y = (end_y - start_y)
-        self.dint_positions = [self.start_pos, (start_x + d_x // 4, start_y + d_y // 4),
-                               (start_x + 3 * d_x // 4, start_y + 3 * d_y // 4), self.end_pos]
-
-    def draw(self):
-        pygame.draw.line(self.surface, self.axes_color, self.start_pos, self.end_pos, self.thickness)
+        self.start_pos, self.end_pos, dint_positions = produce_axes_geometry(alpha, self.radius,
+                                                                             self.center_x, self.center_y)
+        self.dint_positions = list(dint_positions)
+
+    def draw(self, surface=None):
+        if surface is None:
+            surface = self.surface
+        pygame.draw.line(surface, self.axes_color, self.start_pos, self.end_pos, self.thickness)
         for n in range(len(self.dint_positions)):
             pos = self.dint_positions[n]
             if n == 0:
-                pygame.draw.circle(self.surface, self.min_color, pos, self.thickness)
+                pygame.draw.circle(surface, self.min_color, pos, self.thickness)
             elif n == len(self.dint_positions) - 1:
-                pygame.draw.circle(self.surface, self.max_color, pos, self.thickness)
+                pygame.draw.circle(surface, self.max_color, pos, self.thickness)
             else:
-                pygame.draw.circle(self.surface, self.axes_color, pos, self.thickness)
+                pygame.draw.circle(surface, self.axes_color, pos, self.thickness)
 
 
 x_axes = Axes(SCREEN, 9 * W // 32, 9 * W // 32, W // 4, AXES_THICKNESS, AXES_COLOR, AXES_MIN_COLOR, AXES_MAX_COLOR)
@@ -243,132 +270,77 @@ z_axes = Axes(SCREEN, 9 * W // 32, 9 * W // 32, W // 4, AXES_THICKNESS, AXES_COL
 
 class DotRect:
 
-    def __init__(self, surface, width, color_1_1, color_1_2, color_2_1, color_2_2, color_3_1, color_3_2):
+    colors_1 = (RECT_COLOR_1_1, RECT_COLOR_1_2)
+    colors_2 = (RECT_COLOR_2_1, RECT_COLOR_2_2)
+    colors_3 = (RECT_COLOR_3_1, RECT_COLOR_3_2)
+
+    # a panel widget viewing one vertex of a GraphStore, the vertex data itself lives in the store
+    def __init__(self, surface, store, vertex_id, width):
         self.surface = surface
-        self.colors_1 = (color_1_1, color_1_2)
-        self.colors_2 = (color_2_1, color_2_2)
-        self.colors_3 = (color_3_1, color_3_2)
-        self.color = color_1_1
+        self.store = store
+        self.vertex_id = vertex_id
         self.width = width
         self.body_rect = pygame.rect.Rect(0, 0, 0, 0)
-        self.press_allowed = True
-        self.pressed = False
-        self.is_chosen = False
-        self.is_selected_to_connect = False
-        self.dot_3d_pos = (0, 0, 0)
-        self.dot_2d_pos = (0, 0)
-
-    def is_clicked(self):
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        if self.body_rect.collidepoint(pygame.mouse.get_pos()):
-            if mouse_pressed:
-                self.pressed = True
-            elif self.pressed and self.press_allowed:
-                self.pressed = False
-                return True
-        else:
-            self.pressed = False
-            if mouse_pressed:
-                self.press_allowed = False
-            else:
-                self.press_allowed = True
-        return False
+
+    @property
+    def is_chosen(self):
+        return self.store.has_flag(self.vertex_id, DOT_CHOSEN)
+
+    @is_chosen.setter
+    def is_chosen(self, value):
+        self.store.set_flag(self.vertex_id, DOT_CHOSEN, value)
+
+    @property
+    def is_selected_to_connect(self):
+        return self.store.has_flag(self.vertex_id, DOT_SELECTED_TO_CONNECT)
+
+    @is_selected_to_connect.setter
+    def is_selected_to_connect(self, value):
+        self.store.set_flag(self.vertex_id, DOT_SELECTED_TO_CONNECT, value)
+
+    @property
+    def dot_3d_pos(self):
+        return self.store.get_position(self.vertex_id)
+
+    @dot_3d_pos.setter
+    def dot_3d_pos(self, position):
+        self.store.set_position(self.vertex_id, position)
+
+    @property
+    def dot_2d_pos(self):
+        return self.store.get_position_2d(self.vertex_id)
 
     def update_body(self, rect_center_x, rect_center_y):
         rect_center_x -= self.width // 2
         rect_center_y -= self.width // 2
         self.body_rect = pygame.rect.Rect(rect_center_x, rect_center_y, self.width, self.width)
 
-    def draw(self):
+    def draw(self, hovered):
         if self.is_selected_to_connect:
-            if self.body_rect.collidepoint(pygame.mouse.get_pos()):
-                self.color = self.colors_3[1]
+            if hovered:
+                color = self.colors_3[1]
             else:
-                self.color = self.colors_3[0]
+                color = self.colors_3[0]
         elif self.is_chosen:
-            if self.body_rect.collidepoint(pygame.mouse.get_pos()):
-                self.color = self.colors_2[1]
+            if hovered:
+                color = self.colors_2[1]
             else:
-                self.color = self.colors_2[0]
+                color = self.colors_2[0]
         else:
-            if self.body_rect.collidepoint(pygame.mouse.get_pos()):
-                self.color = self.colors_1[1]
+            if hovered:
+                color = self.colors_1[1]
             else:
-                self.color = self.colors_1[0]
-        pygame.draw.rect(self.surface, self.color, self.body_rect)
+                color = self.colors_1[0]
+        pygame.draw.rect(self.surface, color, self.body_rect)
 
 
-def work_on_input(input_index):
-    user_inputs_list = os.listdir(USER_INPUTS_DIR)
+def choose_next_input(input_catalog, input_index):
+    input_num = len(input_catalog)
+    if input_num == 0:
+        return None, input_index
     input_index += 1
-    if input_index == len(user_inputs_list): input_index = 0
-    input_data = pandas.read_csv(f"{USER_INPUTS_DIR}/{user_inputs_list[input_index]}")
-    input_data_dict = input_data.to_dict()
-    new_max_value = int(input_data_dict["maximum value"][0])
-    new_x_axes_alpha = int(input_data_dict["x axes angle"][0])
-    new_y_axes_alpha = int(input_data_dict["y axes angle"][0])
-    new_z_axes_alpha = int(input_data_dict["z axes angle"][0])
-    new_3d_positions = []
-    for n in range(len(input_data)):
-        new_3d_positions.append((list(input_data_dict["x"].values())[n],
-                                 list(input_data_dict["y"].values())[n], list(input_data_dict["z"].values())[n]))
-    new_connections = []
-    for n in range(len(input_data)):
-        if type(list(input_data_dict["connections"].values())[n]) is str:
-            indexes_to_connect = [int(num) - 1 for num in list(input_data_dict["connections"].values())[n].split("-")]
-            for dot_rect_index in indexes_to_connect:
-                if not (n == dot_rect_index or
-                        [n, dot_rect_index] in new_connections or [dot_rect_index, n] in new_connections):
-                    new_connections.append([n, dot_rect_index])
-    return ([new_max_value, new_x_axes_alpha, new_y_axes_alpha, new_z_axes_alpha, new_3d_positions, new_connections],
-            input_index)
-
-
-def save_as_output(dot_rect_num, connections_with_nums, x_positions, y_positions, z_positions,
-                   x_axes_alpha, y_axes_alpha, z_axes_alpha, max_value):
-    x_axes_angle_list = [str(x_axes_alpha)]
-    y_axes_angle_list = [str(y_axes_alpha)]
-    z_axes_angle_list = [str(z_axes_alpha)]
-    max_value_list = [str(max_value)]
-    for _ in range(dot_rect_num - 1):
-        x_axes_angle_list.append(None)
-        y_axes_angle_list.append(None)
-        z_axes_angle_list.append(None)
-        max_value_list.append(None)
-    dataframe = pandas.DataFrame({
-        "no": [str(num) for num in list(range(1, dot_rect_num + 1))],
-        "connections": connections_with_nums,
-        "x": x_positions,
-        "y": y_positions,
-        "z": z_positions,
-        "x axes angle": x_axes_angle_list,
-        "y axes angle": y_axes_angle_list,
-        "z axes angle": z_axes_angle_list,
-        "maximum value": max_value_list
-    })
-    output_no = 1
-    while f"output_{output_no}.csv" in os.listdir(OUTPUTS_DIR): output_no += 1
-    output_file_path = os.path.join(OUTPUTS_DIR, f"output_{output_no}.csv")
-    dataframe.to_csv(output_file_path, index=False)
-
-
-def produce_2d_pos_from_3d_pos(x, y, z, x_alpha, y_alpha, z_alpha, max_value):
-
-    x_radius = x * AXES_LENGTH / (max_value * 2)
-    x_x_add_value = round(x_radius * math.cos(x_alpha * math.pi / 180))
-    x_y_add_value = round(x_radius * math.sin(x_alpha * math.pi / 180))
-
-    y_radius = y * AXES_LENGTH / (max_value * 2)
-    y_x_add_value = round(y_radius * math.cos(y_alpha * math.pi / 180))
-    y_y_add_value = round(y_radius * math.sin(y_alpha * math.pi / 180))
-
-    z_radius = z * AXES_LENGTH / (max_value * 2)
-    z_x_add_value = round(z_radius * math.cos(z_alpha * math.pi / 180))
-    z_y_add_value = round(z_radius * math.sin(z_alpha * math.pi / 180))
-
-    second_dimensional_x_pos = GRAPH_CENTER_X + x_x_add_value + y_x_add_value + z_x_add_value
-    second_dimensional_y_pos = GRAPH_CENTER_Y - x_y_add_value - y_y_add_value - z_y_add_value
-    return second_dimensional_x_pos, second_dimensional_y_pos
+    if input_index >= input_num: input_index = 0
+    return input_catalog.path_at(input_index), input_index
 
 
 def produce_dot_rect_positions(num_rects):
@@ -383,14 +355,75 @@ def produce_dot_rect_positions(num_rects):
     return the_dot_rect_positions
 
 
-def update_dot_rects(the_dot_rects):
-    dot_rect_center_positions = produce_dot_rect_positions(len(the_dot_rects))
-    for n in range(len(the_dot_rects)):
-        the_dot_rects[n].update_body(dot_rect_center_positions[n][0], dot_rect_center_positions[n][1])
-        the_dot_rects[n].is_chosen = False
-    the_chosen_dot_rect = the_dot_rects[-1]
+class DotPanel:
+
+    # shows one page of consecutive vertices on the rect circle, only that page has dot rects, so laying out,
+    # drawing and hit-testing the panel costs the same for any vertex count
+    def __init__(self, surface, store, rect_width):
+        self.surface = surface
+        self.store = store
+        self.rect_width = rect_width
+        self.page_size_index = PANEL_PAGE_SIZES.index(PANEL_DEFAULT_PAGE_SIZE)
+        self.first_index = 0
+        self.dot_rects = []
+        self.layout_key = None
+
+    @property
+    def page_size(self):
+        return PANEL_PAGE_SIZES[self.page_size_index]
+
+    @property
+    def page_num(self):
+        return max(1, -(-len(self.store) // self.page_size))
+
+    def show_index(self, index):
+        self.first_index = index - index % self.page_size
+
+    def scroll(self, page_steps):
+        self.first_index = min(max(self.first_index + page_steps * self.page_size, 0),
+                               (self.page_num - 1) * self.page_size)
+
+    def zoom(self, zoom_steps):
+        # zooming in puts fewer rects on a page, the first vertex of the page stays on it
+        self.page_size_index = min(max(self.page_size_index - zoom_steps, 0), len(PANEL_PAGE_SIZES) - 1)
+        self.show_index(self.first_index)
+
+    def layout(self):
+        self.first_index = min(self.first_index, (self.page_num - 1) * self.page_size)
+        layout_key = (self.store.ids_version, self.first_index, self.page_size)
+        if layout_key != self.layout_key:
+            page_vertex_ids = self.store.ids[self.first_index:self.first_index + self.page_size].tolist()
+            self.dot_rects = [DotRect(self.surface, self.store, vertex_id, self.rect_width)
+                              for vertex_id in page_vertex_ids]
+            for dot_rect, center in zip(self.dot_rects, produce_dot_rect_positions(len(self.dot_rects))):
+                dot_rect.update_body(*center)
+            self.layout_key = layout_key
+        return self.dot_rects
+
+    def dot_rect_of(self, vertex_id):
+        return DotRect(self.surface, self.store, vertex_id, self.rect_width)
+
+    def page_edge_rows(self, the_edge_rows):
+        # the edges between two vertices of the page, as indexes into its dot rects
+        on_page = (the_edge_rows >= self.first_index) & (the_edge_rows < self.first_index + len(self.dot_rects))
+        return the_edge_rows[on_page.all(axis=1)] - self.first_index
+
+    def page_text(self):
+        return f"{self.first_index + 1}-{self.first_index + len(self.dot_rects)} of {len(self.store)}"
+
+
+def choose_last_dot(the_dot_panel, the_graph_store):
+    the_graph_store.clear_flag(DOT_CHOSEN)
+    the_dot_panel.show_index(len(the_graph_store) - 1)
+    the_chosen_dot_rect = the_dot_panel.dot_rect_of(int(the_graph_store.ids[-1]))
     the_chosen_dot_rect.is_chosen = True
-    return the_dot_rects, the_chosen_dot_rect
+    return the_chosen_dot_rect
+
+
+def update_panel_grid(the_panel_grid, the_dot_rects, layout_key):
+    if the_panel_grid.key != layout_key:
+        the_panel_grid.build([(dot_rect.body_rect.left, dot_rect.body_rect.top, dot_rect.body_rect.right,
+                               dot_rect.body_rect.bottom) for dot_rect in the_dot_rects], layout_key)
 
 
 def update_slider_values(sliders, values):
@@ -398,287 +431,538 @@ def update_slider_values(sliders, values):
         sliders[n].set_controller_pos_from_value(values[n])
 
 
-def mouse_on_graph_area():
-    mouse_pos = pygame.mouse.get_pos()
-    if 0 < mouse_pos[0] < 9 * W // 16 - 1 and 0 < mouse_pos[1] < 9 * W // 16 - 1:
-        return True
-    return False
-
-
-current_input_index = 0
-
-text_dot_position_x_surf = FONT_LARGE.render("x:", True, TEXT_COLOR_2)
+def find_dot_rect(the_panel_grid, the_dot_rects, pos):
+    index = the_panel_grid.top_at(*pos)
+    return the_dot_rects[index] if index is not None else None
+
+
+def draw_axes(surface):
+    y_axes.draw(surface)
+    x_axes.draw(surface)
+    z_axes.draw(surface)
+
+
+def draw_dots(surface, the_graph_store, the_edge_rows, the_vertex_rows=None):
+    # only what changes pixels of the surface is drawn, edges short enough to hide under their dots are left out,
+    # the_vertex_rows limits the dots to those rows
+    width, height = surface.get_size()
+    dot_radius = AXES_THICKNESS * 2
+    visible_segments = produce_visible_segments(the_graph_store.positions_2d[the_edge_rows], AXES_THICKNESS,
+                                                width, height, dot_radius)
+    for x_1, y_1, x_2, y_2 in visible_segments.tolist():
+        pygame.draw.line(surface, DOT_COLOR, (x_1, y_1), (x_2, y_2), AXES_THICKNESS)
+    PROFILER.count(DRAW_CALLS, len(visible_segments))
+    PROFILER.count(EDGES_DRAWN, len(visible_segments))
+    dot_2d_positions = the_graph_store.positions_2d
+    chosen_dots = the_graph_store.selection & DOT_CHOSEN != 0
+    if the_vertex_rows is not None:
+        dot_2d_positions, chosen_dots = dot_2d_positions[the_vertex_rows], chosen_dots[the_vertex_rows]
+    if len(dot_2d_positions) >= SPLAT_MIN_DOTS and can_splat(surface):
+        # the chosen dots are splatted too, their own circles cover them right after
+        splat_points(surface, dot_2d_positions, DOT_COLOR, dot_radius)
+        PROFILER.count(DRAW_CALLS)
+        PROFILER.count(DOTS_DRAWN, len(dot_2d_positions))
+    else:
+        visible_dots = produce_visible_points(dot_2d_positions[~chosen_dots], dot_radius, width, height)
+        for dot_2d_pos in visible_dots.tolist():
+            pygame.draw.circle(surface, DOT_COLOR, dot_2d_pos, dot_radius)
+        PROFILER.count(DRAW_CALLS, len(visible_dots))
+        PROFILER.count(DOTS_DRAWN, len(visible_dots))
+    for dot_2d_pos in produce_visible_points(dot_2d_positions[chosen_dots], dot_radius, width, height).tolist():
+        pygame.draw.circle(surface, DOT_CHOSEN_COLOR, dot_2d_pos, dot_radius)
+        PROFILER.count(DRAW_CALLS)
+        PROFILER.count(DOTS_DRAWN)
+
+
+def draw_axes_layer(surface, showing_graph):
+    surface.fill(BG_COLOR)
+    if showing_graph:
+        draw_axes(surface)
+
+
+def draw_chosen_dot(surface, the_graph_store, the_edge_index, vertex_id):
+    # the chosen dot with its edges and neighbours, drawn over a graph layer that leaves them out, so moving the
+    # chosen dot costs as much as it has edges
+    dot_2d_pos = the_graph_store.get_position_2d(vertex_id)
+    neighbour_ids = sorted(the_edge_index.neighbours(vertex_id))
+    neighbour_2d_positions = the_graph_store.positions_2d[the_graph_store.indexes_of(neighbour_ids)].tolist()
+    for neighbour_id, neighbour_2d_pos in zip(neighbour_ids, neighbour_2d_positions):
+        # the way the whole graph draws it, from the end with the lower id
+        if neighbour_id < vertex_id:
+            pygame.draw.line(surface, DOT_COLOR, neighbour_2d_pos, dot_2d_pos, AXES_THICKNESS)
+        else:
+            pygame.draw.line(surface, DOT_COLOR, dot_2d_pos, neighbour_2d_pos, AXES_THICKNESS)
+    for neighbour_2d_pos in neighbour_2d_positions:
+        pygame.draw.circle(surface, DOT_COLOR, neighbour_2d_pos, AXES_THICKNESS * 2)
+    pygame.draw.circle(surface, DOT_CHOSEN_COLOR, dot_2d_pos, AXES_THICKNESS * 2)
+    PROFILER.count(DRAW_CALLS, 2 * len(neighbour_ids) + 1)
+    PROFILER.count(EDGES_DRAWN, len(neighbour_ids))
+    PROFILER.count(DOTS_DRAWN, len(neighbour_ids) + 1)
+
+
+def draw_graph_layer(surface, axes_layer, the_graph_store, the_edge_rows, the_vertex_rows, chosen_vertex_id,
+                     showing_dots):
+    axes_layer.blit(surface)
+    if showing_dots:
+        if chosen_vertex_id is not None:
+            # left to draw_chosen_dot
+            chosen_row = the_graph_store.index_of(chosen_vertex_id)
+            the_edge_rows = the_edge_rows[(the_edge_rows != chosen_row).all(axis=1)]
+            if the_vertex_rows is None:
+                the_vertex_rows = numpy.arange(len(the_graph_store))
+            the_vertex_rows = the_vertex_rows[the_vertex_rows != chosen_row]
+        draw_dots(surface, the_graph_store, the_edge_rows, the_vertex_rows)
+
+
+def draw_panel_layer(surface, the_dot_panel, the_edge_rows):
+    # the panel background with the edge diagram between the dot rects of the page, drawn relative to the panel
+    surface.fill(BG_PANEL_COLOR)
+    the_dot_rects = the_dot_panel.dot_rects
+    page_edge_rows = the_dot_panel.page_edge_rows(the_edge_rows)
+    for index_1, index_2 in page_edge_rows.tolist():
+        pygame.draw.line(surface, TEXT_COLOR_2,
+                         the_dot_rects[index_1].body_rect.move(-BG_PANEL_RECT.x, -BG_PANEL_RECT.y).center,
+                         the_dot_rects[index_2].body_rect.move(-BG_PANEL_RECT.x, -BG_PANEL_RECT.y).center,
+                         AXES_THICKNESS)
+    PROFILER.count(DRAW_CALLS, len(page_edge_rows))
+
+
+def draw_profiler_hud(surface):
+    # frame rate and the median and 99th percentile time of every phase over the frames the profiler holds
+    lines = [f"{PROFILER.fps():.1f} fps", "p50 / p99 ms"]
+    for phase, (p50, p99) in zip(PROFILE_PHASES, PROFILER.percentiles().tolist()):
+        lines.append(f"{phase}: {p50:.2f} / {p99:.2f}")
+    draw_calls, edges_drawn, dots_drawn = PROFILER.last_counts()
+    lines.append(f"{draw_calls} draws, {edges_drawn} edges, {dots_drawn} dots")
+    for line_num, line in enumerate(lines):
+        # not through TEXT_CACHE, these change every frame and would push the lasting texts out of it
+        text_surf = FONT_SMALL.render(line, True, TEXT_COLOR_2)
+        surface.blit(text_surf, (W // 64, 21 * W // 64 + line_num * W // 64))
+
+
+text_dot_position_x_surf = TEXT_CACHE.render(FONT_LARGE, "x:", TEXT_COLOR_2)
 text_dot_position_x_rect = text_dot_position_x_surf.get_rect(midleft=(47 * W // 64, 29 * W // 64))
-text_dot_position_y_surf = FONT_LARGE.render("y:", True, TEXT_COLOR_2)
+text_dot_position_y_surf = TEXT_CACHE.render(FONT_LARGE, "y:", TEXT_COLOR_2)
 text_dot_position_y_rect = text_dot_position_y_surf.get_rect(midleft=(47 * W // 64, 31 * W // 64))
-text_dot_position_z_surf = FONT_LARGE.render("z:", True, TEXT_COLOR_2)
+text_dot_position_z_surf = TEXT_CACHE.render(FONT_LARGE, "z:", TEXT_COLOR_2)
 text_dot_position_z_rect = text_dot_position_z_surf.get_rect(midleft=(47 * W // 64, 33 * W // 64))
-
-dot_rects = [DotRect(SCREEN, RECT_WIDTH,
-                     RECT_COLOR_1_1, RECT_COLOR_1_2, RECT_COLOR_2_1, RECT_COLOR_2_2, RECT_COLOR_3_1, RECT_COLOR_3_2)]
-dot_rects, chosen_dot_rect = update_dot_rects(dot_rects)
-
-selected_dot_rects_to_connect = []
-dot_rect_connections = []
-
-showing_graph = True
-showing_dots = True
-
-while True:
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            exit()
-
-    # # # Mechanics # # #
-
+STARTUP_PROFILE.mark("widgets")
+
+
+def main(startup_profile=False, session=None, frame_budget_seconds=FRAME_BUDGET_SECONDS):
+
+    # a recorder or a player of a recorded session in place of the live one, see session.py
+    if session is None:
+        session = LiveSession()
+    current_input_index = 0
+
+    # the widgets are shared by every run, a replayed session starts from them as a new window would
+    reset_sliders()
+    for slider in sliders:
+        slider.holding = False
+    INPUT.reset(WIDGET_REGION_NUM)
+
+    graph_store = GraphStore()
+    graph_store.add_vertex()
+    dot_panel = DotPanel(SCREEN, graph_store, RECT_WIDTH)
+    chosen_dot_rect = choose_last_dot(dot_panel, graph_store)
+
+    selected_vertex_ids_to_connect = []
+    edge_index = EdgeIndex()
+
+    showing_graph = True
+    showing_dots = True
+    output_extension = "csv"
+
+    input_catalog = InputCatalog(USER_INPUTS_DIR)
+    input_loader = InputLoader(input_catalog.load)
+    showing_first_frame = True   # the first input is prefetched once the first frame is on screen
+    failed_input_file_name = None   # the last file Get Input could not load, shown until the next one is asked for
+
+    axes_layer = Layer(9 * W // 16, 9 * W // 16)
+    graph_layer = Layer(9 * W // 16, 9 * W // 16)
+    panel_layer = Layer(BG_PANEL_RECT.width, BG_PANEL_RECT.height, BG_PANEL_RECT.x, BG_PANEL_RECT.y)
+
+    # hit-testing grids, the panel one is rebuilt when the rects move and the dot one when the projection changes
+    panel_grid = UniformGrid(2 * RECT_WIDTH)
+    dot_grid = PointGrid(4 * PICK_RADIUS)
+    dot_rects = dot_panel.layout()
+    update_panel_grid(panel_grid, dot_rects, dot_panel.layout_key)
+    # behind the widgets, a press on the graph picks a dot and one on the panel goes to the dot rect under it
+    INPUT.add(GRAPH_AREA_RECT, graph_layer)
+    INPUT.add(BG_PANEL_RECT, panel_layer, lambda pos: find_dot_rect(panel_grid, dot_rects, pos))
     maximum_value = slider_max_value.calculate_value()
 
-    if mouse_on_graph_area():
-        if pygame.mouse.get_pressed()[0] and chosen_dot_rect is not None:
-            chosen_dot_rect.is_chosen = False
-            chosen_dot_rect = None
-        if button_hide_graph.is_clicked():
+    # while an axes or the maximum value slider is held only a sample of the graph that fits the frame budget is
+    # projected and drawn, the rows of that sample, None when the whole graph is
+    progressive_sampler = ProgressiveSampler(frame_budget_seconds)
+    drawn_vertex_rows = None
+
+    clamp_key = None
+    projection_key = None
+    frame_key = None
+    idle = False
+    STARTUP_PROFILE.mark("main setup")
+
+    while True:
+
+        PROFILER.start_frame()
+        events = session.get_events()
+        if idle and not events:
+            # nothing on screen can change before the next event arrives
+            events = [session.wait_event()]
+            PROFILER.start_frame()
+        dot_slider_xs = [slider.controller_x for slider in dot_sliders]
+        INPUT.dispatch(events)
+        # the dot sliders moved by the mouse, the others only show where the chosen dot is
+        moved_dot_sliders = [slider.controller_x != controller_x
+                             for slider, controller_x in zip(dot_sliders, dot_slider_xs)]
+        for event in events:
+            if event.type == pygame.QUIT:
+                input_loader.shutdown()
+                return SessionState(graph_store, edge_index, slider_x_axes_alpha.calculate_value(),
+                                    slider_y_axes_alpha.calculate_value(), slider_z_axes_alpha.calculate_value(),
+                                    maximum_value)
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                frame_key = None
+            if event.type == pygame.MOUSEWHEEL and BG_PANEL_RECT.collidepoint(INPUT.mouse_pos):
+                # the wheel turns the pages of the panel, with ctrl held it zooms
+                if session.key_mods() & pygame.KMOD_CTRL:
+                    dot_panel.zoom(event.y)
+                else:
+                    dot_panel.scroll(-event.y)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                PROFILER.toggle()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                with open(produce_output_file_path(OUTPUTS_DIR, "csv", "profile"), "w", newline="") as file:
+                    PROFILER.write_csv(file)
+        PROFILER.end_phase(PHASE_EVENTS)
+
+        # # # Mechanics # # #
+
+        mouse_pos = INPUT.mouse_pos
+
+        # a press anywhere on the graph side lets go of the chosen dot, unless it picks a dot
+        for pressed_target, pressed_pos in INPUT.presses:
+            if not GRAPH_AREA_RECT.collidepoint(pressed_pos):
+                continue
+            picked_index = None
+            if pressed_target is graph_layer and showing_dots:
+                if dot_grid.key != (projection_key, graph_store.positions_version):
+                    dot_grid.build_from_points(graph_store.positions_2d, PICK_RADIUS,
+                                               (projection_key, graph_store.positions_version))
+                picked_index = dot_grid.nearest(*pressed_pos)
+            if picked_index is not None:
+                graph_store.clear_flag(DOT_CHOSEN)
+                chosen_dot_rect = dot_panel.dot_rect_of(int(graph_store.ids[picked_index]))
+                chosen_dot_rect.is_chosen = True
+                dot_panel.show_index(picked_index)
+                update_slider_values([slider_dot_x_pos, slider_dot_y_pos, slider_dot_z_pos],
+                                     chosen_dot_rect.dot_3d_pos)
+            elif chosen_dot_rect is not None:
+                chosen_dot_rect.is_chosen = False
+                chosen_dot_rect = None
+        if INPUT.is_clicked(button_hide_graph):
             showing_graph = not showing_graph
-        if button_hide_dots.is_clicked():
+        if INPUT.is_clicked(button_hide_dots):
             showing_dots = not showing_dots
-        if button_reset_graph.is_clicked():
+        if INPUT.is_clicked(button_reset_graph):
             slider_x_axes_alpha.set_controller_pos_from_value(330)
             slider_y_axes_alpha.set_controller_pos_from_value(90)
             slider_z_axes_alpha.set_controller_pos_from_value(210)
-        slider_max_value.movement()
         if maximum_value != slider_max_value.calculate_value():
             maximum_value = slider_max_value.calculate_value()
             if chosen_dot_rect is not None:
                 chosen_dot_rect.is_chosen = False
                 chosen_dot_rect = None
-        slider_x_axes_alpha.movement()
-        slider_y_axes_alpha.movement()
-        slider_z_axes_alpha.movement()
         slider_dot_x_pos.update_min_max_sequence_values(maximum_value)
         slider_dot_y_pos.update_min_max_sequence_values(maximum_value)
         slider_dot_z_pos.update_min_max_sequence_values(maximum_value)
 
-    if button_get_input.is_clicked() and len(os.listdir(USER_INPUTS_DIR)) > 0:
-        worked_input_list, current_input_index = work_on_input(current_input_index)
-        # maximum value
-        maximum_value = worked_input_list[0]
-        slider_max_value.set_controller_pos_from_value(maximum_value)
-        # axes alphas
-        slider_x_axes_alpha.set_controller_pos_from_value(worked_input_list[1])
-        slider_y_axes_alpha.set_controller_pos_from_value(worked_input_list[2])
-        slider_z_axes_alpha.set_controller_pos_from_value(worked_input_list[3])
-        # dot rects and 3d positions
-        dot_rects = []
-        for i in range(len(worked_input_list[4])):
-            new_dot_rect = DotRect(SCREEN, RECT_WIDTH, RECT_COLOR_1_1, RECT_COLOR_1_2,
-                                   RECT_COLOR_2_1, RECT_COLOR_2_2, RECT_COLOR_3_1, RECT_COLOR_3_2)
-            new_dot_rect.dot_3d_pos = worked_input_list[4][i]
-            dot_rects.append(new_dot_rect)
-        dot_rects, chosen_dot_rect = update_dot_rects(dot_rects)
-        chosen_dot_rect.is_chosen = False
-        chosen_dot_rect = None
-        # dot rect connections
-        selected_dot_rects_to_connect = []
-        dot_rect_connections = []
-        for i1, i2 in worked_input_list[5]:
-            dot_rect_connections.append([dot_rects[i1], dot_rects[i2]])
-
-    if button_save_data.is_clicked():
-        # dot rect connections
-        dot_rect_connections_with_nums = []
-        for i in range(len(dot_rects)):
-            dot_rect_connections_with_nums.append([])
-        for index in range(len(dot_rects) - 1):
-            for dot_rect_1, dot_rect_2 in dot_rect_connections:
-                if dot_rects.index(dot_rect_1) == index < dot_rects.index(dot_rect_2):
-                    dot_rect_connections_with_nums[index].append(dot_rects.index(dot_rect_2) + 1)
-                elif dot_rects.index(dot_rect_2) == index < dot_rects.index(dot_rect_1):
-                    dot_rect_connections_with_nums[index].append(dot_rects.index(dot_rect_1) + 1)
-        for i in range(len(dot_rect_connections_with_nums)):
-            connection_list = [str(num) for num in dot_rect_connections_with_nums[i]]
-            dot_rect_connections_with_nums[i] = "-".join(connection_list)
-        # dot rect 3d positions
-        dot_rect_x_positions = []
-        dot_rect_y_positions = []
-        dot_rect_z_positions = []
-        for dot_rect in dot_rects:
-            dot_rect_x_positions.append(str(dot_rect.dot_3d_pos[0]))
-            dot_rect_y_positions.append(str(dot_rect.dot_3d_pos[1]))
-            dot_rect_z_positions.append(str(dot_rect.dot_3d_pos[2]))
-        # saving as csv
-        save_as_output(len(dot_rects), dot_rect_connections_with_nums, dot_rect_x_positions, dot_rect_y_positions,
-                       dot_rect_z_positions, slider_x_axes_alpha.calculate_value(),
-                       slider_y_axes_alpha.calculate_value(), slider_z_axes_alpha.calculate_value(), maximum_value)
-
-    if button_new_dot.is_clicked():
-        dot_rects.append(DotRect(SCREEN, RECT_WIDTH, RECT_COLOR_1_1, RECT_COLOR_1_2,
-                                 RECT_COLOR_2_1, RECT_COLOR_2_2, RECT_COLOR_3_1, RECT_COLOR_3_2))
-        dot_rects, chosen_dot_rect = update_dot_rects(dot_rects)
-        update_slider_values([slider_dot_x_pos, slider_dot_y_pos, slider_dot_z_pos], (0, 0, 0))
-
-    if button_remove.is_clicked() and chosen_dot_rect is not None and len(dot_rects) > 1:
-        if chosen_dot_rect in selected_dot_rects_to_connect:
-            selected_dot_rects_to_connect.remove(chosen_dot_rect)
-        dot_rects.remove(chosen_dot_rect)
-        dot_rects, chosen_dot_rect = update_dot_rects(dot_rects)
-        new_dot_rect_connections = [connection for connection in dot_rect_connections]
-        for connection in dot_rect_connections:
-            if not (connection[0] in dot_rects and connection[1] in dot_rects):
-                new_dot_rect_connections.remove(connection)
-        dot_rect_connections = [connection for connection in new_dot_rect_connections]
-        update_slider_values([slider_dot_x_pos, slider_dot_y_pos, slider_dot_z_pos], chosen_dot_rect.dot_3d_pos)
-
-    if button_reset_all.is_clicked():
-        current_input_index = 0
-        slider_x_axes_alpha.set_controller_pos_from_value(330)
-        slider_y_axes_alpha.set_controller_pos_from_value(90)
-        slider_z_axes_alpha.set_controller_pos_from_value(210)
-        slider_dot_x_pos.set_controller_pos_from_value(0)
-        slider_dot_y_pos.set_controller_pos_from_value(0)
-        slider_dot_z_pos.set_controller_pos_from_value(0)
-        slider_max_value.set_controller_pos_from_value(4)
-        showing_graph = True
-        showing_dots = True
-        dot_rects = [DotRect(SCREEN, RECT_WIDTH,
-                             RECT_COLOR_1_1, RECT_COLOR_1_2, RECT_COLOR_2_1, RECT_COLOR_2_2, RECT_COLOR_3_1,
-                             RECT_COLOR_3_2)]
-        dot_rects, chosen_dot_rect = update_dot_rects(dot_rects)
-        selected_dot_rects_to_connect = []
-        dot_rect_connections = []
-
-    x_axes.set_positions(slider_x_axes_alpha.calculate_value())
-    y_axes.set_positions(slider_y_axes_alpha.calculate_value())
-    z_axes.set_positions(slider_z_axes_alpha.calculate_value())
-
-    for dot_rect in dot_rects:
-        if dot_rect.body_rect.collidepoint(pygame.mouse.get_pos()):
-            for i in range(len(dot_rects)):
-                dot_rects[i].is_chosen = False
-            chosen_dot_rect = dot_rect
+        if INPUT.is_clicked(button_get_input):
+            input_file_path, current_input_index = choose_next_input(input_catalog, current_input_index)
+            if input_file_path is not None:
+                input_loader.request(input_file_path)
+                failed_input_file_name = None
+
+        loading_path = input_loader.loading_path
+        try:
+            graph_data = session.take_loaded(input_loader)
+        except Exception:
+            # a file that cannot be read leaves the graph on screen as it is, the next Get Input goes on to the file
+            # after it
+            graph_data = None
+            failed_input_file_name = os.path.basename(loading_path)
+            input_loader.prefetch(choose_next_input(input_catalog, current_input_index)[0])
+        if graph_data is not None:
+            # maximum value
+            maximum_value = graph_data.max_value
+            slider_max_value.set_controller_pos_from_value(maximum_value)
+            # axes alphas
+            slider_x_axes_alpha.set_controller_pos_from_value(graph_data.x_axes_alpha)
+            slider_y_axes_alpha.set_controller_pos_from_value(graph_data.y_axes_alpha)
+            slider_z_axes_alpha.set_controller_pos_from_value(graph_data.z_axes_alpha)
+            # dot rects and 3d positions
+            new_vertex_ids = graph_store.load_positions(graph_data.positions)
+            graph_store.clear_flag(DOT_CHOSEN)
+            chosen_dot_rect = None
+            dot_panel.show_index(0)
+            # dot rect connections
+            selected_vertex_ids_to_connect = []
+            edge_index.clear()
+            edge_index.add_edges(new_vertex_ids[graph_data.edges])
+            # the next file of the cycle is parsed while this one is looked at
+            input_loader.prefetch(choose_next_input(input_catalog, current_input_index)[0])
+
+        if INPUT.is_clicked(button_save_format):
+            output_extension = "g3d" if output_extension == "csv" else "csv"
+
+        if INPUT.is_clicked(button_save_data):
+            save_as_output(produce_output_file_path(OUTPUTS_DIR, output_extension), graph_store, edge_index,
+                           slider_x_axes_alpha.calculate_value(), slider_y_axes_alpha.calculate_value(),
+                           slider_z_axes_alpha.calculate_value(), maximum_value)
+
+        if INPUT.is_clicked(button_new_dot):
+            graph_store.add_vertex()
+            chosen_dot_rect = choose_last_dot(dot_panel, graph_store)
+            update_slider_values([slider_dot_x_pos, slider_dot_y_pos, slider_dot_z_pos], (0, 0, 0))
+
+        if INPUT.is_clicked(button_remove) and chosen_dot_rect is not None and len(graph_store) > 1:
+            if chosen_dot_rect.vertex_id in selected_vertex_ids_to_connect:
+                selected_vertex_ids_to_connect.remove(chosen_dot_rect.vertex_id)
+            edge_index.remove_vertex(chosen_dot_rect.vertex_id)
+            graph_store.remove_vertex(chosen_dot_rect.vertex_id)
+            chosen_dot_rect = choose_last_dot(dot_panel, graph_store)
+            update_slider_values([slider_dot_x_pos, slider_dot_y_pos, slider_dot_z_pos], chosen_dot_rect.dot_3d_pos)
+
+        if INPUT.is_clicked(button_reset_all):
+            current_input_index = 0
+            input_loader.forget()
+            failed_input_file_name = None
+            input_loader.prefetch(choose_next_input(input_catalog, current_input_index)[0])
+            reset_sliders()
+            showing_graph = True
+            showing_dots = True
+            output_extension = "csv"
+            graph_store.clear()
+            graph_store.add_vertex()
+            chosen_dot_rect = choose_last_dot(dot_panel, graph_store)
+            selected_vertex_ids_to_connect = []
+            edge_index.clear()
+
+        if dot_panel.page_num > 1:
+            if INPUT.is_clicked(button_previous_page):
+                dot_panel.scroll(-1)
+            if INPUT.is_clicked(button_next_page):
+                dot_panel.scroll(1)
+        dot_rects = dot_panel.layout()
+        update_panel_grid(panel_grid, dot_rects, dot_panel.layout_key)
+        hovered_dot_rect = find_dot_rect(panel_grid, dot_rects, mouse_pos)
+        if hovered_dot_rect is not None:
+            graph_store.clear_flag(DOT_CHOSEN)
+            chosen_dot_rect = hovered_dot_rect
             chosen_dot_rect.is_chosen = True
             update_slider_values([slider_dot_x_pos, slider_dot_y_pos, slider_dot_z_pos], chosen_dot_rect.dot_3d_pos)
-        if dot_rect.is_clicked():
-            if dot_rect.is_selected_to_connect:
-                dot_rect.is_selected_to_connect = False
-                selected_dot_rects_to_connect.remove(dot_rect)
+        clicked_dot_rect = next((target for target in INPUT.clicks if isinstance(target, DotRect)), None)
+        if clicked_dot_rect is not None:
+            if clicked_dot_rect.is_selected_to_connect:
+                clicked_dot_rect.is_selected_to_connect = False
+                selected_vertex_ids_to_connect.remove(clicked_dot_rect.vertex_id)
             else:
-                dot_rect.is_selected_to_connect = True
-                selected_dot_rects_to_connect.append(dot_rect)
-                if len(selected_dot_rects_to_connect) == 2:
-                    if (selected_dot_rects_to_connect in dot_rect_connections
-                            or selected_dot_rects_to_connect[::-1] in dot_rect_connections):
-                        for d_rect in selected_dot_rects_to_connect:
-                            d_rect.is_selected_to_connect = False
-                        for connection in dot_rect_connections:
-                            if selected_dot_rects_to_connect in [connection, connection[::-1]]:
-                                dot_rect_connections.remove(connection)
-                        selected_dot_rects_to_connect = []
-                    else:
-                        dot_rect_connections.append(selected_dot_rects_to_connect)
-                        for d_rect in selected_dot_rects_to_connect:
-                            d_rect.is_selected_to_connect = False
-                        selected_dot_rects_to_connect = []
-
-    slider_dot_x_pos.movement()
-    slider_dot_y_pos.movement()
-    slider_dot_z_pos.movement()
-    text_dot_position_surf = FONT_LARGE.render(f"({slider_dot_x_pos.calculate_value()}, "
-                                                   f"{slider_dot_y_pos.calculate_value()}, "
-                                                   f"{slider_dot_z_pos.calculate_value()})",
-                                                   True, TEXT_COLOR_2)
-    text_dot_position_rect = text_dot_position_surf.get_rect(center=(55 * W // 64, 25 * W // 64))
-    if chosen_dot_rect is not None:
-        chosen_dot_rect.dot_3d_pos = (slider_dot_x_pos.calculate_value(),
-                                      slider_dot_y_pos.calculate_value(), slider_dot_z_pos.calculate_value())
-
-    for dot_rect in dot_rects:
-        new_dot_pos = [v for v in dot_rect.dot_3d_pos]
-        for i in range(3):
-            if new_dot_pos[i] < -maximum_value:
-                new_dot_pos[i] = -maximum_value
-            elif new_dot_pos[i] > maximum_value:
-                new_dot_pos[i] = maximum_value
-        dot_rect.dot_3d_pos = tuple(v for v in new_dot_pos)
-
-    for dot_rect in dot_rects:
-        dot_rect.dot_2d_pos = produce_2d_pos_from_3d_pos(
-            dot_rect.dot_3d_pos[0], dot_rect.dot_3d_pos[1], dot_rect.dot_3d_pos[2],
-            slider_x_axes_alpha.calculate_value(), slider_y_axes_alpha.calculate_value(),
-            slider_z_axes_alpha.calculate_value(), maximum_value)
-
-    # # # GUI # # #
-
-    text_max_values_surf = FONT_LARGE.render(f"max:  ± {maximum_value}",
-                                                 True, TEXT_COLOR_1)
-    text_max_values_rect = text_max_values_surf.get_rect(center=(3 * W // 32, 31 * W // 64))
-    text_x_axes_tangent_surf = FONT_LARGE.render(f"x:  {slider_x_axes_alpha.calculate_value()}°",
-                                                     True, TEXT_COLOR_1)
-    text_x_axes_tangent_rect = text_x_axes_tangent_surf.get_rect(midright=(25 * W // 64, 29 * W // 64))
-    text_y_axes_tangent_surf = FONT_LARGE.render(f"y:  {slider_y_axes_alpha.calculate_value()}°",
-                                                     True, TEXT_COLOR_1)
-    text_y_axes_tangent_rect = text_y_axes_tangent_surf.get_rect(midright=(25 * W // 64, 31 * W // 64))
-    text_z_axes_tangent_surf = FONT_LARGE.render(f"z:  {slider_z_axes_alpha.calculate_value()}°",
-                                                     True, TEXT_COLOR_1)
-    text_z_axes_tangent_rect = text_z_axes_tangent_surf.get_rect(midright=(25 * W // 64, 33 * W // 64))
-
-    SCREEN.fill(BG_COLOR)
-
-    if showing_graph:
-        y_axes.draw()
-        x_axes.draw()
-        z_axes.draw()
+                clicked_dot_rect.is_selected_to_connect = True
+                selected_vertex_ids_to_connect.append(clicked_dot_rect.vertex_id)
+                if len(selected_vertex_ids_to_connect) == 2:
+                    edge_index.toggle(*selected_vertex_ids_to_connect)
+                    for vertex_id in selected_vertex_ids_to_connect:
+                        graph_store.set_flag(vertex_id, DOT_SELECTED_TO_CONNECT, False)
+                    selected_vertex_ids_to_connect = []
+
+        if chosen_dot_rect is not None and any(moved_dot_sliders):
+            # a coordinate off the grid of the sliders is only rounded when its own slider is moved
+            chosen_dot_rect.dot_3d_pos = tuple(slider.calculate_value() if moved else value for slider, moved, value
+                                               in zip(dot_sliders, moved_dot_sliders, chosen_dot_rect.dot_3d_pos))
+        # the widgets that are not drawn take no presses
+        for slider in (slider_dot_x_pos, slider_dot_y_pos, slider_dot_z_pos):
+            INPUT.set_enabled(slider, chosen_dot_rect is not None)
+        INPUT.set_enabled(button_previous_page, dot_panel.page_num > 1)
+        INPUT.set_enabled(button_next_page, dot_panel.page_num > 1)
+
+        axes_alphas = (slider_x_axes_alpha.calculate_value(), slider_y_axes_alpha.calculate_value(),
+                       slider_z_axes_alpha.calculate_value())
+        PROFILER.end_phase(PHASE_MECHANICS)
+
+        dragging = any(slider.holding for slider in (slider_max_value, slider_x_axes_alpha, slider_y_axes_alpha,
+                                                     slider_z_axes_alpha))
+        sample_fraction = session.sample_fraction(progressive_sampler, dragging, len(graph_store) + len(edge_index))
+        render_start_time = time.perf_counter()
+        if clamp_key != (maximum_value, graph_store.layout_version):
+            # the dot sliders keep the dots they move in range, only a new maximum value or new vertices need this
+            graph_store.clamp(maximum_value)
+            clamp_key = (maximum_value, graph_store.layout_version)
+        if projection_key != (maximum_value, axes_alphas, graph_store.layout_version, edge_index.version,
+                              sample_fraction):
+            x_axes.set_positions(axes_alphas[0])
+            y_axes.set_positions(axes_alphas[1])
+            z_axes.set_positions(axes_alphas[2])
+            projection_basis = produce_projection_basis(*axes_alphas)
+            edge_ids = edge_index.edge_array()
+            edge_rows = graph_store.indexes_of(edge_ids)
+            if sample_fraction < 1:
+                # the same vertices and edges stay in the sample from frame to frame, and the chosen dot with them
+                drawn_edge_rows = edge_rows[produce_sample_mask(produce_edge_keys(edge_ids), sample_fraction)]
+                sampled_vertices = produce_sample_mask(graph_store.ids, sample_fraction) | \
+                    (graph_store.selection & DOT_CHOSEN != 0)
+                drawn_vertex_rows = numpy.union1d(numpy.flatnonzero(sampled_vertices), drawn_edge_rows.ravel())
+                graph_store.positions_2d[drawn_vertex_rows] = produce_2d_positions_from_3d_positions(
+                    graph_store.positions[drawn_vertex_rows], projection_basis, maximum_value,
+                    AXES_LENGTH, GRAPH_CENTER_X, GRAPH_CENTER_Y)
+            else:
+                drawn_edge_rows, drawn_vertex_rows = edge_rows, None
+                graph_store.positions_2d[:] = produce_2d_positions_from_3d_positions(
+                    graph_store.positions, projection_basis, maximum_value,
+                    AXES_LENGTH, GRAPH_CENTER_X, GRAPH_CENTER_Y)
+            graph_store.take_moved_vertex_ids()
+            projection_key = (maximum_value, axes_alphas, graph_store.layout_version, edge_index.version,
+                              sample_fraction)
+        elif graph_store.moved_vertex_ids:
+            # dots moved by the dot sliders, only their own rows are projected again
+            moved_rows = graph_store.indexes_of(graph_store.take_moved_vertex_ids())
+            graph_store.positions_2d[moved_rows] = produce_2d_positions_from_3d_positions(
+                graph_store.positions[moved_rows], projection_basis, maximum_value,
+                AXES_LENGTH, GRAPH_CENTER_X, GRAPH_CENTER_Y)
+
+        PROFILER.end_phase(PHASE_PROJECTION)
+
+        # # # GUI # # #
+
+        new_frame_key = (projection_key, graph_store.version, dot_panel.layout_key, showing_graph, showing_dots,
+                         output_extension, PROFILER.enabled,
+                         input_loader.loading_path, failed_input_file_name, GRAPH_AREA_RECT.collidepoint(mouse_pos),
+                         tuple(button.body_rect.collidepoint(mouse_pos) for button in buttons),
+                         tuple((slider.controller_x, slider.holding, slider.calculate_value()) for slider in sliders),
+                         hovered_dot_rect.vertex_id if hovered_dot_rect is not None else None,
+                         chosen_dot_rect.vertex_id if chosen_dot_rect is not None else None)
+        idle = new_frame_key == frame_key and not input_loader.is_loading
+        if new_frame_key == frame_key:
+            CLOCK.tick(session.frame_rate)
+            continue
+        frame_key = new_frame_key
+
+        text_dot_position_surf = TEXT_CACHE.render(FONT_LARGE, f"({slider_dot_x_pos.calculate_value()}, "
+                                                                f"{slider_dot_y_pos.calculate_value()}, "
+                                                                f"{slider_dot_z_pos.calculate_value()})", TEXT_COLOR_2)
+        text_dot_position_rect = text_dot_position_surf.get_rect(center=(55 * W // 64, 25 * W // 64))
+        text_max_values_surf = TEXT_CACHE.render(FONT_LARGE, f"max:  ± {maximum_value}", TEXT_COLOR_1)
+        text_max_values_rect = text_max_values_surf.get_rect(center=(3 * W // 32, 31 * W // 64))
+        text_x_axes_tangent_surf = TEXT_CACHE.render(FONT_LARGE, f"x:  {axes_alphas[0]}°", TEXT_COLOR_1)
+        text_x_axes_tangent_rect = text_x_axes_tangent_surf.get_rect(midright=(25 * W // 64, 29 * W // 64))
+        text_y_axes_tangent_surf = TEXT_CACHE.render(FONT_LARGE, f"y:  {axes_alphas[1]}°", TEXT_COLOR_1)
+        text_y_axes_tangent_rect = text_y_axes_tangent_surf.get_rect(midright=(25 * W // 64, 31 * W // 64))
+        text_z_axes_tangent_surf = TEXT_CACHE.render(FONT_LARGE, f"z:  {axes_alphas[2]}°", TEXT_COLOR_1)
+        text_z_axes_tangent_rect = text_z_axes_tangent_surf.get_rect(midright=(25 * W // 64, 33 * W // 64))
+
+        axes_layer.update((showing_graph, axes_alphas), draw_axes_layer, showing_graph)
+        chosen_vertex_id = chosen_dot_rect.vertex_id if chosen_dot_rect is not None else None
+        if graph_layer.update((axes_layer.key, showing_dots, projection_key, chosen_vertex_id), draw_graph_layer,
+                              axes_layer, graph_store, drawn_edge_rows, drawn_vertex_rows, chosen_vertex_id,
+                              showing_dots) and showing_dots and sample_fraction == 1:
+            # only whole graph redraws are timed, the cost of a sample is estimated from them
+            progressive_sampler.measure(time.perf_counter() - render_start_time, len(graph_store) + len(edge_rows))
+        panel_layer.update((edge_index.version, dot_panel.layout_key),
+                           draw_panel_layer, dot_panel, edge_rows)
+
+        graph_layer.blit(SCREEN)
+        if showing_dots and chosen_vertex_id is not None:
+            draw_chosen_dot(SCREEN, graph_store, edge_index, chosen_vertex_id)
+
+        if GRAPH_AREA_RECT.collidepoint(mouse_pos):
+            if showing_graph:
+                button_hide_graph.draw("Hide Graph")
+            else:
+                button_hide_graph.draw("Show Graph")
+            if showing_dots:
+                button_hide_dots.draw("Hide Dots")
+            else:
+                button_hide_dots.draw("Show Dots")
+            button_reset_graph.draw(None)
+            button_reset_all.draw(None)
+            button_get_input.draw("Loading..." if input_loader.is_loading else "Get Input")
+            button_save_data.draw(None)
+            button_save_format.draw(f"As {output_extension.upper()}")
+            slider_max_value.draw()
+            slider_x_axes_alpha.draw()
+            slider_y_axes_alpha.draw()
+            slider_z_axes_alpha.draw()
+            SCREEN.blit(text_max_values_surf, text_max_values_rect)
+            SCREEN.blit(text_x_axes_tangent_surf, text_x_axes_tangent_rect)
+            SCREEN.blit(text_y_axes_tangent_surf, text_y_axes_tangent_rect)
+            SCREEN.blit(text_z_axes_tangent_surf, text_z_axes_tangent_rect)
+
+        panel_layer.blit(SCREEN)
 
-    if showing_dots:
-        for connection in dot_rect_connections:
-            pygame.draw.line(SCREEN, DOT_COLOR, connection[0].dot_2d_pos, connection[1].dot_2d_pos, AXES_THICKNESS)
-        for dot_rect in [d_rect for d_rect in dot_rects if d_rect != chosen_dot_rect]:
-            pygame.draw.circle(SCREEN, DOT_COLOR, dot_rect.dot_2d_pos, AXES_THICKNESS * 2)
         if chosen_dot_rect is not None:
-            pygame.draw.circle(SCREEN, DOT_CHOSEN_COLOR, chosen_dot_rect.dot_2d_pos, AXES_THICKNESS * 2)
-
-    if mouse_on_graph_area():
-        if showing_graph:
-            button_hide_graph.draw("Hide Graph")
-        else:
-            button_hide_graph.draw("Show Graph")
-        if showing_dots:
-            button_hide_dots.draw("Hide Dots")
-        else:
-            button_hide_dots.draw("Show Dots")
-        button_reset_graph.draw(None)
-        button_reset_all.draw(None)
-        button_get_input.draw(None)
-        button_save_data.draw(None)
-        slider_max_value.draw()
-        slider_x_axes_alpha.draw()
-        slider_y_axes_alpha.draw()
-        slider_z_axes_alpha.draw()
-        SCREEN.blit(text_max_values_surf, text_max_values_rect)
-        SCREEN.blit(text_x_axes_tangent_surf, text_x_axes_tangent_rect)
-        SCREEN.blit(text_y_axes_tangent_surf, text_y_axes_tangent_rect)
-        SCREEN.blit(text_z_axes_tangent_surf, text_z_axes_tangent_rect)
-
-    pygame.draw.rect(SCREEN, BG_PANEL_COLOR, BG_PANEL_RECT)
-
-    if chosen_dot_rect is not None:
-        slider_dot_x_pos.draw()
-        slider_dot_y_pos.draw()
-        slider_dot_z_pos.draw()
-        SCREEN.blit(text_dot_position_x_surf, text_dot_position_x_rect)
-        SCREEN.blit(text_dot_position_y_surf, text_dot_position_y_rect)
-        SCREEN.blit(text_dot_position_z_surf, text_dot_position_z_rect)
-        SCREEN.blit(text_dot_position_surf, text_dot_position_rect)
-    button_new_dot.draw(None)
-    button_remove.draw(None)
-    for connection in dot_rect_connections:
-        pygame.draw.line(
-            SCREEN, TEXT_COLOR_2, connection[0].body_rect.center, connection[1].body_rect.center, AXES_THICKNESS)
-    for dot_rect in dot_rects:
-        dot_rect.draw()
-
-    # # # # # # #
-
-    CLOCK.tick(60)
-    pygame.display.update()
+            slider_dot_x_pos.draw()
+            slider_dot_y_pos.draw()
+            slider_dot_z_pos.draw()
+            SCREEN.blit(text_dot_position_x_surf, text_dot_position_x_rect)
+            SCREEN.blit(text_dot_position_y_surf, text_dot_position_y_rect)
+            SCREEN.blit(text_dot_position_z_surf, text_dot_position_z_rect)
+            SCREEN.blit(text_dot_position_surf, text_dot_position_rect)
+        if input_loader.is_loading:
+            text_loading_surf = TEXT_CACHE.render(
+                FONT_MEDIUM, f"Loading {os.path.basename(input_loader.loading_path)}...", TEXT_COLOR_2)
+            SCREEN.blit(text_loading_surf, text_loading_surf.get_rect(center=(RECTS_CENTER_X, W // 64)))
+        elif failed_input_file_name is not None:
+            text_failed_surf = TEXT_CACHE.render(FONT_MEDIUM, f"Could not load {failed_input_file_name}", TEXT_COLOR_2)
+            SCREEN.blit(text_failed_surf, text_failed_surf.get_rect(center=(RECTS_CENTER_X, W // 64)))
+        button_new_dot.draw(None)
+        button_remove.draw(None)
+        if dot_panel.page_num > 1:
+            button_previous_page.draw(None)
+            button_next_page.draw(None)
+            text_page_surf = TEXT_CACHE.render(FONT_SMALL, dot_panel.page_text(), TEXT_COLOR_2)
+            SCREEN.blit(text_page_surf, text_page_surf.get_rect(midright=(63 * W // 64, 3 * W // 32)))
+        for dot_rect in dot_rects:
+            dot_rect.draw(dot_rect is hovered_dot_rect)
+        PROFILER.count(DRAW_CALLS, len(dot_rects))
+        if PROFILER.enabled:
+            draw_profiler_hud(SCREEN)
+
+        # # # # # # #
+
+        PROFILER.end_phase(PHASE_GUI)
+        CLOCK.tick(session.frame_rate)
+        PROFILER.resume()
+        pygame.display.update()
+        PROFILER.end_phase(PHASE_DISPLAY)
+        PROFILER.end_frame()
+
+        if showing_first_frame:
+            showing_first_frame = False
+            STARTUP_PROFILE.mark("first frame")
+            if startup_profile:
+                print(STARTUP_PROFILE.report())
+            input_loader.prefetch(choose_next_input(input_catalog, current_input_index)[0])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Third dimensional graph visualiser.")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print how long every start phase took once the first frame is on screen")
+    parser.add_argument("--profile", action="store_true", help="start with the frame profiler shown, F3 toggles it")
+    parser.add_argument("--frame-budget-ms", type=float, default=FRAME_BUDGET_SECONDS * 1000,
+                        help="milliseconds a frame may take while a view slider is dragged, larger graphs are "
+                             "drawn as a sample that fits in them, 1000/60 by default")
+    parser.add_argument("--record", action="store_true",
+                        help="write what happens to outputs/session_<n>.jsonl.gz, replay.py plays it back")
+    arguments = parser.parse_args()
+    if arguments.profile:
+        PROFILER.toggle()
+    main_session = LiveSession()
+    if arguments.record:
+        main_session = SessionRecorder(produce_output_file_path(OUTPUTS_DIR, "jsonl.gz", "session"))
+    try:
+        main(arguments.startup_profile, main_session, arguments.frame_budget_ms / 1000)
+    finally:
+        main_session.close()
+        pygame.quit()
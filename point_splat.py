@@ -0,0 +1,50 @@
+import numpy
+import pygame
+from functools import lru_cache
+
+SPLAT_MIN_DOTS = 4096   # fewer dots are cheaper to draw one circle at a time
+
+
+@lru_cache(maxsize=None)
+def produce_circle_rows(radius):
+    # (y offset, first x offset, last x offset) of every row of the disk pygame.draw.circle fills around a dot
+    size = 2 * radius + 3
+    stamp = pygame.Surface((size, size), depth=32)
+    pygame.draw.circle(stamp, (255, 255, 255), (radius + 1, radius + 1), radius)
+    filled = pygame.surfarray.array2d(stamp) != 0
+    circle_rows = []
+    for y in range(size):
+        xs = numpy.flatnonzero(filled[:, y])
+        if len(xs):
+            circle_rows.append((y - radius - 1, int(xs[0]) - radius - 1, int(xs[-1]) - radius - 1))
+    return tuple(circle_rows)
+
+
+def can_splat(surface):
+    return surface.get_bytesize() in (1, 2, 4)
+
+
+def splat_points(surface, points_2d, color, radius):
+    # fills the disks around every point straight in the pixel array of the surface, the cost depends on the
+    # surface size and the point number, never on how many disks overlap, and the pixels match pygame.draw.circle
+    width, height = surface.get_size()
+    padded_width, padded_height = width + 2 * radius, height + 2 * radius
+    points_2d = numpy.asarray(points_2d, dtype=numpy.int64).reshape(-1, 2)
+    # negative coordinates wrap to huge unsigned ones, so one comparison per axis finds the points off the grid
+    xs = (points_2d[:, 0] + radius).view(numpy.uint64)
+    ys = (points_2d[:, 1] + radius).view(numpy.uint64)
+    inside = (xs < padded_width) & (ys < padded_height)
+    # dot centers on a grid padded by the radius, summed along x so any run of a row is counted with one subtraction,
+    # points off the grid all land in one extra cell behind it
+    grid_size = (padded_width + 1) * padded_height
+    centers = numpy.zeros(grid_size + 1, dtype=numpy.int32)
+    centers[numpy.where(inside, (xs + 1) * padded_height + ys, grid_size)] = 1
+    center_sums = numpy.cumsum(centers[:grid_size].reshape(padded_width + 1, padded_height), axis=0)
+    covered = numpy.zeros((width, height), dtype=bool)
+    for y_offset, first_x_offset, last_x_offset in produce_circle_rows(radius):
+        rows = slice(radius - y_offset, height + radius - y_offset)
+        covered |= center_sums[radius - first_x_offset + 1:width + radius - first_x_offset + 1, rows] > \
+            center_sums[radius - last_x_offset:width + radius - last_x_offset, rows]
+    pixels = pygame.surfarray.pixels2d(surface)
+    pixels[covered] = surface.map_rgb(color)
+    del pixels
@@ -0,0 +1,48 @@
+import math
+import numpy
+
+FRAME_BUDGET_SECONDS = 1 / 60   # projecting and drawing the graph should take no longer while a slider is dragged
+MIN_SAMPLE_FRACTION = 1 / 256
+REFINE_FACTOR = 4   # how much more of the graph every frame after the drag shows, until all of it is back
+HASH_MULTIPLIER = numpy.uint64(0x9E3779B97F4A7C15)
+
+
+def produce_sample_mask(keys, fraction):
+    # the same keys always get the same pseudo random rank, so a growing fraction only ever adds to the sample
+    if fraction >= 1:
+        return numpy.ones(len(keys), dtype=bool)
+    ranks = (numpy.asarray(keys).astype(numpy.uint64) * HASH_MULTIPLIER) >> numpy.uint64(40)
+    return ranks < fraction * (1 << 24)
+
+
+def produce_edge_keys(edge_ids):
+    edge_ids = numpy.asarray(edge_ids).astype(numpy.uint64).reshape(-1, 2)
+    return (edge_ids[:, 0] * HASH_MULTIPLIER) ^ edge_ids[:, 1]
+
+
+class ProgressiveSampler:
+
+    # decides which share of the graph to render, the time per vertex or edge is measured on whole graph redraws,
+    # so the share fits the budget on whatever machine and graph it runs with
+    def __init__(self, frame_budget_seconds=FRAME_BUDGET_SECONDS):
+        self.frame_budget_seconds = frame_budget_seconds
+        self.seconds_per_item = 0.0
+        self.fraction = 1.0
+
+    def update(self, dragging, item_num):
+        if dragging:
+            expected_seconds = self.seconds_per_item * item_num
+            if expected_seconds > self.frame_budget_seconds:
+                # a power of two, so timing noise does not change the sample from frame to frame
+                fraction = 2.0 ** math.floor(math.log2(self.frame_budget_seconds / expected_seconds))
+                self.fraction = max(fraction, MIN_SAMPLE_FRACTION)
+            else:
+                self.fraction = 1.0
+        else:
+            self.fraction = min(self.fraction * REFINE_FACTOR, 1.0)
+        return self.fraction
+
+    def measure(self, seconds, item_num):
+        # the last whole graph redraw is always of the graph a drag starts on, older ones tell nothing about it
+        if item_num:
+            self.seconds_per_item = seconds / item_num
@@ -0,0 +1,75 @@
+import math
+import numpy
+from functools import lru_cache
+
+ANGLE_STEP = 5   # the axes sliders snap to multiples of it
+COS_SIN_TABLE = tuple((math.cos(alpha * math.pi / 180), math.sin(alpha * math.pi / 180))
+                      for alpha in range(0, 360, ANGLE_STEP))
+GEOMETRY_CACHE_SIZE = 256
+
+
+def produce_cos_sin(alpha):
+    # alpha in degrees, snapped angles come from the table, the values are the same either way
+    if alpha % ANGLE_STEP == 0 and 0 <= alpha < 360:
+        return COS_SIN_TABLE[int(alpha) // ANGLE_STEP]
+    return math.cos(alpha * math.pi / 180), math.sin(alpha * math.pi / 180)
+
+
+@lru_cache(maxsize=GEOMETRY_CACHE_SIZE)
+def produce_projection_basis(x_alpha, y_alpha, z_alpha):
+    # one (cos, sin) row per axes, the screen direction a unit along that axes moves a dot, together with
+    # produce_2d_positions_from_3d_positions it gives the exact positions the visualiser draws, the array is
+    # shared between callers, so it is read only
+    basis = numpy.array([produce_cos_sin(alpha) for alpha in (x_alpha, y_alpha, z_alpha)])
+    basis.setflags(write=False)
+    return basis
+
+
+@lru_cache(maxsize=GEOMETRY_CACHE_SIZE)
+def produce_axes_geometry(alpha, radius, center_x, center_y):
+    # the start and end of an axes line through the center at alpha degrees and the points between them it marks
+    cos_alpha, sin_alpha = produce_cos_sin(alpha)
+    x = radius * cos_alpha
+    y = radius * sin_alpha
+    start_x = center_x - x
+    start_y = center_y + y
+    end_x = center_x + x
+    end_y = center_y - y
+    d_x = (end_x - start_x)
+    d_y = (end_y - start_y)
+    dint_positions = ((start_x, start_y), (start_x + d_x // 4, start_y + d_y // 4),
+                      (start_x + 3 * d_x // 4, start_y + 3 * d_y // 4), (end_x, end_y))
+    return (start_x, start_y), (end_x, end_y), dint_positions
+
+
+def produce_2d_positions_from_3d_positions(positions, basis, max_value, axes_length, center_x, center_y):
+    radii = numpy.asarray(positions, dtype=float).reshape(-1, 3) * axes_length / (max_value * 2)
+    # every axes contribution is rounded on its own, the same way the per dot version did it
+    add_values = numpy.zeros((len(radii), 2))
+    for axes_index in range(3):
+        add_values += numpy.rint(radii[:, axes_index, None] * basis[axes_index])
+    positions_2d = numpy.empty((len(radii), 2), dtype=int)
+    positions_2d[:, 0] = center_x + add_values[:, 0]
+    positions_2d[:, 1] = center_y - add_values[:, 1]
+    return positions_2d
+
+
+def produce_visible_points(points_2d, radius, width, height):
+    # the distinct points whose circles reach into the (width, height) viewport, drawing a point twice changes nothing
+    points_2d = numpy.asarray(points_2d).reshape(-1, 2)
+    visible = ((points_2d >= -radius) & (points_2d < (width + radius, height + radius))).all(axis=1)
+    points_2d = points_2d[visible] + radius
+    column_height = height + 2 * radius
+    pixel_keys = numpy.unique(points_2d[:, 0] * column_height + points_2d[:, 1])
+    return numpy.stack((pixel_keys // column_height, pixel_keys % column_height), axis=1) - radius
+
+
+def produce_visible_segments(segments_2d, margin, width, height, hidden_length=0):
+    # drops the segments that lie past one side of the viewport, those not longer than hidden_length, which the
+    # dots drawn over their ends cover, and repeats of the same segment
+    segments_2d = numpy.asarray(segments_2d).reshape(-1, 4)
+    xs, ys = segments_2d[:, 0::2], segments_2d[:, 1::2]
+    outside = (xs < -margin).all(axis=1) | (xs >= width + margin).all(axis=1) | \
+              (ys < -margin).all(axis=1) | (ys >= height + margin).all(axis=1)
+    long = ((segments_2d[:, 2:] - segments_2d[:, :2]) ** 2).sum(axis=1) > hidden_length ** 2
+    return numpy.unique(segments_2d[~outside & long], axis=0)
@@ -0,0 +1,46 @@
+import pygame
+from collections import OrderedDict
+
+TEXT_CACHE_SIZE = 256
+
+
+class Layer:
+
+    # an off-screen surface that is only drawn again when the key describing its contents changes
+    def __init__(self, width, height, x=0, y=0):
+        self.surface = pygame.Surface((width, height))
+        self.position = (x, y)
+        self.key = None
+
+    def update(self, key, draw_function, *args):
+        if key == self.key:
+            return False
+        draw_function(self.surface, *args)
+        self.key = key
+        return True
+
+    def invalidate(self):
+        self.key = None
+
+    def blit(self, surface):
+        surface.blit(self.surface, self.position)
+
+
+class TextCache:
+
+    # rendered text surfaces keyed by font, text and color, the least recently used one is dropped first
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        text_surf = self.surfaces.get(key)
+        if text_surf is None:
+            text_surf = font.render(text, True, color)
+            self.surfaces[key] = text_surf
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return text_surf
@@ -0,0 +1,57 @@
+import os
+import hashlib
+import argparse
+import numpy
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def replay_session(session_file_path, frame_locked=False):
+    # the main loop of the visualiser driven by a recorded session, the graph files it loaded have to be in
+    # user_inputs as they were when it was recorded
+    import main
+    from session import SessionPlayer
+    player = SessionPlayer(session_file_path, frame_locked)
+    session_state = main.main(session=player)
+    return session_state, player.frame_times()
+
+
+def produce_state_digest(session_state):
+    # equal for two replays that ended on the same graph
+    digest = hashlib.sha1()
+    digest.update(numpy.ascontiguousarray(session_state.graph_store.positions, dtype="<f8").tobytes())
+    digest.update(numpy.ascontiguousarray(session_state.graph_store.indexes_of(
+        session_state.edge_index.edge_array()), dtype="<i8").tobytes())
+    digest.update(repr(session_state[2:]).encode())
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plays a session recorded with main.py --record back without a "
+                                                 "window and reports its frame times and the graph it ended on.")
+    parser.add_argument("session_file")
+    parser.add_argument("--frame-locked", action="store_true",
+                        help="at most 60 frames a second like the recording, as fast as possible by default")
+    parser.add_argument("--save", choices=("csv", "g3d"), default=None,
+                        help="save the graph it ended on to outputs like Save Data")
+    arguments = parser.parse_args()
+
+    final_state, frame_seconds = replay_session(arguments.session_file, arguments.frame_locked)
+    frame_ms = frame_seconds * 1000
+    print(f"{len(frame_ms)} frames in {frame_seconds.sum():.2f} s")
+    if len(frame_ms):
+        p50, p95, p99 = numpy.percentile(frame_ms, (50, 95, 99)).tolist()
+        print(f"frame ms: mean {frame_ms.mean():.2f}, p50 {p50:.2f}, p95 {p95:.2f}, p99 {p99:.2f}, "
+              f"max {frame_ms.max():.2f}")
+    print(f"{len(final_state.graph_store)} vertices, {len(final_state.edge_index)} edges, "
+          f"max value {final_state.max_value}, axes angles {final_state.x_axes_alpha}, {final_state.y_axes_alpha}, "
+          f"{final_state.z_axes_alpha}")
+    print(f"state digest {produce_state_digest(final_state)}")
+    if arguments.save is not None:
+        from graph_io import produce_output_file_path, save_as_output
+        output_file_path = produce_output_file_path(os.path.join(SCRIPT_DIR, "outputs"), arguments.save)
+        save_as_output(output_file_path, final_state.graph_store, final_state.edge_index, final_state.x_axes_alpha,
+                       final_state.y_axes_alpha, final_state.z_axes_alpha, final_state.max_value)
+        print(f"saved to {output_file_path}")
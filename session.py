@@ -0,0 +1,152 @@
+import gzip
+import json
+import time
+import numpy
+import pygame
+from collections import namedtuple
+
+SESSION_FORMAT = "3d graph visualiser session"
+SESSION_VERSION = 1
+SESSION_FRAME_RATE = 60
+# the events the main loop reacts to and the attributes of them it reads, the others are not recorded
+RECORDED_EVENTS = {"QUIT": (), "VIDEOEXPOSE": (), "WINDOWEXPOSED": (),
+                   "MOUSEMOTION": ("pos", "rel", "buttons"), "MOUSEBUTTONDOWN": ("pos", "button"),
+                   "MOUSEBUTTONUP": ("pos", "button"), "MOUSEWHEEL": ("x", "y", "flipped"),
+                   "KEYDOWN": ("key", "mod"), "KEYUP": ("key", "mod")}
+RECORDED_EVENT_NAMES = {getattr(pygame, name): name for name in RECORDED_EVENTS}
+
+# what the main loop ends with, the graph and the values Save Data writes next to it
+SessionState = namedtuple("SessionState", ["graph_store", "edge_index", "x_axes_alpha", "y_axes_alpha",
+                                           "z_axes_alpha", "max_value"])
+
+
+def encode_event(event):
+    name = RECORDED_EVENT_NAMES[event.type]
+    return [name] + [getattr(event, attribute) for attribute in RECORDED_EVENTS[name]]
+
+
+def decode_event(values):
+    name, values = values[0], values[1:]
+    attributes = {attribute: tuple(value) if type(value) is list else value
+                  for attribute, value in zip(RECORDED_EVENTS[name], values)}
+    return pygame.event.Event(getattr(pygame, name), attributes)
+
+
+class LiveSession:
+
+    # where the main loop takes everything from that is not the same on every run: the events, the keyboard
+    # modifiers, when a graph file finished loading and what share of the graph is drawn while dragging
+    frame_rate = SESSION_FRAME_RATE
+
+    def get_events(self):
+        return pygame.event.get()
+
+    def wait_event(self):
+        return pygame.event.wait()
+
+    def key_mods(self):
+        return pygame.key.get_mods()
+
+    def take_loaded(self, input_loader):
+        return input_loader.take_loaded()
+
+    def sample_fraction(self, progressive_sampler, dragging, item_num):
+        return progressive_sampler.update(dragging, item_num)
+
+    def close(self):
+        pass
+
+
+class SessionRecorder(LiveSession):
+
+    # a live session that writes every frame as one JSON line of a gzip file, the mouse state at the start of the
+    # frame, then what the frame took from the session: [x, y, buttons, mods, loaded, fraction, events]
+    def __init__(self, file_path):
+        self.file = gzip.open(file_path, "wt", encoding="utf-8")
+        self.file.write(json.dumps({"format": SESSION_FORMAT, "version": SESSION_VERSION}) + "\n")
+        self.frame = None
+
+    def _write_frame(self):
+        if self.frame is not None:
+            self.file.write(json.dumps(self.frame, separators=(",", ":")) + "\n")
+
+    def get_events(self):
+        self._write_frame()
+        mouse_x, mouse_y = pygame.mouse.get_pos()
+        mouse_buttons = sum(1 << n for n, pressed in enumerate(pygame.mouse.get_pressed()) if pressed)
+        self.frame = [mouse_x, mouse_y, mouse_buttons, 0, 0, 1.0, []]
+        events = super().get_events()
+        self.frame[6] += [encode_event(event) for event in events if event.type in RECORDED_EVENT_NAMES]
+        return events
+
+    def wait_event(self):
+        event = super().wait_event()
+        if event.type in RECORDED_EVENT_NAMES:
+            self.frame[6].append(encode_event(event))
+        return event
+
+    def key_mods(self):
+        self.frame[3] = super().key_mods()
+        return self.frame[3]
+
+    def take_loaded(self, input_loader):
+        try:
+            graph_data = super().take_loaded(input_loader)
+        except Exception:
+            # a file that failed to load is waited for on replay too, so it fails in the same frame
+            self.frame[4] = 1
+            raise
+        self.frame[4] = int(graph_data is not None)
+        return graph_data
+
+    def sample_fraction(self, progressive_sampler, dragging, item_num):
+        self.frame[5] = super().sample_fraction(progressive_sampler, dragging, item_num)
+        return self.frame[5]
+
+    def close(self):
+        self._write_frame()
+        self.frame = None
+        self.file.close()
+
+
+class SessionPlayer(LiveSession):
+
+    # plays a recorded session back frame by frame, a file that finished loading in the recorded frame is waited
+    # for, so every run reaches the same state, at full speed or locked to the frame rate of the recording
+    def __init__(self, file_path, frame_locked=False):
+        with gzip.open(file_path, "rt", encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if header.get("format") != SESSION_FORMAT or header.get("version") != SESSION_VERSION:
+                raise ValueError(f"{file_path} is not a version {SESSION_VERSION} session file")
+            self.frames = [json.loads(line) for line in file]
+        self.frame_rate = SESSION_FRAME_RATE if frame_locked else 0
+        self.frame_num = 0
+        self.frame = None
+        self.frame_start_times = []
+
+    def get_events(self):
+        self.frame_start_times.append(time.perf_counter())
+        if self.frame_num == len(self.frames):
+            # a recording cut short, it ends like a closed window
+            return [pygame.event.Event(pygame.QUIT)]
+        self.frame = self.frames[self.frame_num]
+        self.frame_num += 1
+        return [decode_event(values) for values in self.frame[6]]
+
+    def wait_event(self):
+        # the recorded frame did not wait, nothing is waited for here either
+        return pygame.event.Event(pygame.NOEVENT)
+
+    def key_mods(self):
+        return self.frame[3]
+
+    def take_loaded(self, input_loader):
+        return input_loader.take_loaded(wait=True) if self.frame[4] else None
+
+    def sample_fraction(self, progressive_sampler, dragging, item_num):
+        progressive_sampler.update(dragging, item_num)
+        return self.frame[5]
+
+    def frame_times(self):
+        # seconds from the start of every frame to the start of the next, the last one ends with the replay
+        return numpy.diff(self.frame_start_times + [time.perf_counter()])
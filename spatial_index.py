@@ -0,0 +1,80 @@
+import numpy
+
+
+class UniformGrid:
+
+    # buckets item indexes by the square cells their (left, top, right, bottom) rects overlap, right and bottom
+    # excluded like pygame rects, so a point lookup only looks at the items of a single cell
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.rects = numpy.zeros((0, 4), dtype=int)
+        self.items = numpy.zeros(0, dtype=numpy.int64)
+        self.cells = {}
+        self.key = None
+
+    def build(self, rects, key=None):
+        rects = numpy.asarray(rects).reshape(-1, 4)
+        self.rects = rects
+        self.key = key
+        if len(rects) == 0:
+            self.items = numpy.zeros(0, dtype=numpy.int64)
+            self.cells = {}
+            return
+        first_cells = numpy.floor_divide(rects[:, :2], self.cell_size).astype(numpy.int64)
+        last_corners = numpy.maximum(rects[:, 2:] - 1, rects[:, :2])
+        last_cells = numpy.floor_divide(last_corners, self.cell_size).astype(numpy.int64)
+        spans = last_cells - first_cells
+        cell_keys = []
+        items = []
+        for column_offset in range(int(spans[:, 0].max()) + 1):
+            for row_offset in range(int(spans[:, 1].max()) + 1):
+                covering = (spans[:, 0] >= column_offset) & (spans[:, 1] >= row_offset)
+                indexes = numpy.flatnonzero(covering)
+                columns = first_cells[indexes, 0] + column_offset
+                rows = first_cells[indexes, 1] + row_offset
+                cell_keys.append(columns * (1 << 32) + rows)
+                items.append(indexes)
+        cell_keys = numpy.concatenate(cell_keys)
+        items = numpy.concatenate(items)
+        order = numpy.lexsort((items, cell_keys))
+        cell_keys, self.items = cell_keys[order], items[order]
+        unique_keys, starts = numpy.unique(cell_keys, return_index=True)
+        ends = numpy.append(starts[1:], len(cell_keys))
+        self.cells = dict(zip(unique_keys.tolist(), zip(starts.tolist(), ends.tolist())))
+
+    def candidates(self, x, y):
+        cell = self.cells.get((x // self.cell_size) * (1 << 32) + y // self.cell_size)
+        if cell is None:
+            return self.items[:0]
+        return self.items[cell[0]:cell[1]]
+
+    def top_at(self, x, y):
+        # the last item, the one drawn on top, whose rect contains the point
+        candidates = self.candidates(x, y)
+        if len(candidates) == 0:
+            return None
+        rects = self.rects[candidates]
+        containing = candidates[(rects[:, 0] <= x) & (x < rects[:, 2]) & (rects[:, 1] <= y) & (y < rects[:, 3])]
+        if len(containing) == 0:
+            return None
+        return int(containing[-1])
+
+
+class PointGrid(UniformGrid):
+
+    # points indexed through the squares around them, for picking the nearest one within a radius
+    def build_from_points(self, points, radius, key=None):
+        points = numpy.asarray(points).reshape(-1, 2)
+        self.points = points
+        self.radius = radius
+        self.build(numpy.hstack((points - radius, points + radius + 1)), key)
+
+    def nearest(self, x, y):
+        candidates = self.candidates(x, y)[::-1]   # the last point drawn wins a tie
+        if len(candidates) == 0:
+            return None
+        squared_distances = ((self.points[candidates] - (x, y)) ** 2).sum(axis=1)
+        nearest_index = int(numpy.argmin(squared_distances))
+        if squared_distances[nearest_index] > self.radius ** 2:
+            return None
+        return int(candidates[nearest_index])
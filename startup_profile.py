@@ -0,0 +1,23 @@
+import time
+
+
+class StartupProfile:
+
+    # perf_counter marks at the end of every start phase, from the moment this module was imported
+    def __init__(self):
+        self.marks = [("start", time.perf_counter())]
+
+    def mark(self, phase):
+        self.marks.append((phase, time.perf_counter()))
+
+    def report(self):
+        lines = [f"{'phase':<24}{'ms':>10}{'total ms':>12}"]
+        start_time = previous_time = self.marks[0][1]
+        for phase, phase_time in self.marks[1:]:
+            lines.append(f"{phase:<24}{(phase_time - previous_time) * 1000:>10.1f}"
+                         f"{(phase_time - start_time) * 1000:>12.1f}")
+            previous_time = phase_time
+        return "\n".join(lines)
+
+
+STARTUP_PROFILE = StartupProfile()